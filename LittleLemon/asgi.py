@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
+os.environ.setdefault('WARMUP', '1')
+os.environ.setdefault('ASYNC_READ_PATH', '1')
 
 application = get_asgi_application()
+
+from LittleLemonAPI import warmup  # noqa: E402
+
+if warmup.get_config()['ENABLED']:
+    warmup.prime()
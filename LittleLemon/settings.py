@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,7 +47,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the latency covers the whole stack.
+    "LittleLemonAPI.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Removes itself unless REQUEST_PROFILING["SAMPLE_RATE"] is set.
+    "LittleLemonAPI.profiling.RequestProfilerMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -75,16 +80,78 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "LittleLemon.wsgi.application"
 
+# Async-native views for the menu and cart reads. Enabled by asgi.py;
+# under WSGI they would only add an event loop per request.
+ASYNC_READ_PATH = os.environ.get("ASYNC_READ_PATH") == "1"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# The profile is picked from the environment:
+#   DB_ENGINE=sqlite (default) or postgres
+#   DB_CONN_MAX_AGE: seconds to keep a connection open between requests
+#   DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT (postgres)
+#   DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE (postgres, psycopg 3 pool)
+#   DB_REPLICA_HOSTS: comma separated hosts of read replicas (postgres)
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "littlelemon"),
+            "USER": os.environ.get("DB_USER", "littlelemon"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            # Pooled connections are returned to the pool after each
+            # request, so they must not also be persistent.
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+                    "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                    "timeout": 10,
+                },
+            },
+        }
+    }
+    for number, host in enumerate(
+        filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1
+    ):
+        DATABASES[f"replica{number}"] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+    if len(DATABASES) > 1:
+        DATABASE_ROUTERS = ["LittleLemonAPI.dbrouters.MenuReplicaRouter"]
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Transactions take the write lock up front instead of
+                # failing with "database is locked" on their first write.
+                "transaction_mode": "IMMEDIATE",
+                "timeout": 20,
+                # WAL lets readers run next to the single writer.
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA busy_timeout=20000;"
+                    "PRAGMA mmap_size=134217728;"
+                    "PRAGMA temp_store=MEMORY;"
+                ),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -105,6 +172,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords. Passwords stored with another one
+# are hashed again on the next login (LOGIN["REHASH"]); listing e.g.
+# Argon2PasswordHasher first migrates users as they log in.
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -130,14 +208,149 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "LittleLemonAPI.authentication.CachedTokenAuthentication",
         # Add Djozer
         "rest_framework.authentication.SessionAuthentication",
     ),
+    # Uses orjson when it is installed.
+    "DEFAULT_RENDERER_CLASSES": (
+        "LittleLemonAPI.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
+    # Token buckets, see LittleLemonAPI/throttling.py. Managers and the
+    # delivery crew are throttled by role instead of the "user" rate.
+    "DEFAULT_THROTTLE_CLASSES": (
+        "LittleLemonAPI.throttling.AnonThrottle",
+        "LittleLemonAPI.throttling.UserThrottle",
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "60/min",
+        "user": "300/min",
+        "delivery_crew": "600/min",
+        "manager": "1200/min",
+        "login": "10/min",
+    },
+    # Proxies in front of the app that append to X-Forwarded-For. Anonymous
+    # and login throttles key on the client address: with 0 it is
+    # REMOTE_ADDR, and the header, which clients can forge, is ignored.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", "0")),
 }
 
 DJOSER = {
     "USER_ID_FIELD": "username",
 }
+
+# REDIS_URL: shared cache of all workers and hosts (needs the redis package).
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+# Server-side cache for the menu list and detail routes. With REDIS_URL
+# its version is shared, so a change made by any worker, the admin or
+# importmenu reaches every worker at once. Without it, each worker caches
+# on its own and only sees changes made elsewhere once its version is
+# renewed, every TIMEOUT seconds. ETags are digests of the bodies, so
+# unchanged responses keep theirs (and their 304s) across renewals.
+if REDIS_URL:
+    MENU_CACHE = {
+        "BACKEND": "LittleLemonAPI.cache.DjangoMenuCache",
+        "ALIAS": "default",
+        "TIMEOUT": 300,
+    }
+else:
+    MENU_CACHE = {
+        "BACKEND": "LittleLemonAPI.cache.LocMemMenuCache",
+        "MAX_ENTRIES": 1024,
+        "TIMEOUT": 5,
+    }
+
+# Cross-request cache of user group names and permissions (seconds).
+# Changes made through User.groups are invalidated at once in the same
+# process, other workers see them after the TTL.
+ROLE_CACHE_TTL = 60
+
+# Counter store of the throttles. LocMemThrottleStore counts per process;
+# "LittleLemonAPI.throttling.SQLiteThrottleStore" with "PATH" shares the
+# counters between the workers of one host.
+THROTTLE_STORE = {
+    "BACKEND": os.environ.get(
+        "THROTTLE_STORE", "LittleLemonAPI.throttling.LocMemThrottleStore"
+    ),
+}
+
+# In-process cache of resolved auth tokens (seconds). Deleted tokens and
+# saved users are evicted at once in the same process, other workers keep
+# accepting a logged-out token or a deactivated user for up to the TTL.
+TOKEN_CACHE_TTL = 5
+TOKEN_CACHE_MAX_ENTRIES = 10000
+
+# Per-request SQL and timing profile, see LittleLemonAPI/profiling.py.
+# Sampled requests get a Server-Timing header, a log line and an entry in
+# the ring buffer read by /api/profiles/ (staff only).
+REQUEST_PROFILING = {
+    "SAMPLE_RATE": float(os.environ.get("REQUEST_PROFILING_SAMPLE_RATE", "0")),
+    "SLOW_QUERIES": 5,
+    # Statements repeated more often than this in one request are flagged.
+    "N_PLUS_ONE_THRESHOLD": 5,
+    "BUFFER_SIZE": 200,
+}
+
+# Per-route request metrics served at /metrics (staff only). Set
+# METRICS_DIR to a directory shared by the workers of one host, e.g.
+# gunicorn's, to report them all together.
+METRICS = {
+    "ENABLED": True,
+    "DIRECTORY": os.environ.get("METRICS_DIR"),
+    "FLUSH_INTERVAL": 1.0,
+}
+
+# Menu change log behind /api/menu-items/changes/, see
+# LittleLemonAPI/changelog.py. Run `manage.py compactmenuchanges` daily.
+# changes/stream/ holds a worker per client, so it is only served under
+# ASGI (ASYNC_READ_PATH), where a stream holds no thread.
+MENU_CHANGES = {
+    "PAGE_SIZE": 500,
+    "POLL_INTERVAL": 1.0,
+    "STREAM_TIMEOUT": 55.0,
+    "TOMBSTONE_DAYS": 30,
+    "STREAM": ASYNC_READ_PATH,
+}
+
+# Delivery crew assignment of new orders, see LittleLemonAPI/assignment.py.
+# Checkouts wake a worker thread in their process; without WORKER, run
+# `manage.py assignorders --loop` instead.
+ORDER_ASSIGNMENT = {
+    "WORKER": os.environ.get("ORDER_ASSIGNMENT_WORKER", "1") == "1",
+    "BATCH_SIZE": 100,
+    "POLL_INTERVAL": 5.0,
+    "REBUILD_INTERVAL": 60.0,
+}
+
+# Worker warm-up, see LittleLemonAPI/warmup.py. wsgi.py and asgi.py turn
+# it on; WARMUP_BASE_URL (the public URL of the API) also caches the first
+# menu page.
+WARMUP = {
+    "ENABLED": os.environ.get("WARMUP") == "1",
+    "MAX_USERS": 200,
+    "BASE_URL": os.environ.get("WARMUP_BASE_URL"),
+}
+
+# Token login, see LittleLemonAPI/login.py. Passwords are checked on a pool
+# of LOGIN_WORKERS threads; logins beyond MAX_PENDING queued checks get 503.
+# Only ASGI logins are freed while they wait; under WSGI the request thread
+# waits for its check, so sync gunicorn workers stay blocked (see
+# gunicorn.conf.py for ASGI and threaded workers).
+LOGIN = {
+    "WORKERS": int(os.environ.get("LOGIN_WORKERS", min(4, os.cpu_count() or 1))),
+    "MAX_PENDING": 32,
+    "TIMEOUT": 10.0,
+    "REHASH": True,
+}
@@ -12,5 +12,11 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
+os.environ.setdefault('WARMUP', '1')
 
 application = get_wsgi_application()
+
+from LittleLemonAPI import warmup  # noqa: E402
+
+if warmup.get_config()['ENABLED']:
+    warmup.prime()
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class LittlelemonapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'LittleLemonAPI'
+
+    def ready(self):
+        from django.core.signals import request_finished
+
+        from . import signals  # noqa: F401
+        from . import warmup
+
+        # The database part runs from wsgi.py/asgi.py: queries are not
+        # allowed before every app is ready.
+        if warmup.get_config()["ENABLED"]:
+            warmup.prepare()
+            request_finished.connect(warmup.first_response)
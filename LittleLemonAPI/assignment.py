@@ -0,0 +1,182 @@
+"""Automatic delivery crew assignment.
+
+Orders are created without a delivery crew: the open orders without one
+are the queue. assign_pending() hands a batch of them out, each to the
+Delivery_Crew member with the fewest open orders, taken from a heap of
+open-order counts (CrewBalancer) built with one grouped query.
+
+A checkout wakes the worker thread of its process up (started on first
+use), which also polls every POLL_INTERVAL seconds for orders it missed.
+`manage.py assignorders` runs the same loop as a separate process.
+
+Orders are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the
+database supports it, and written with a "no crew yet" condition, so
+concurrent workers never assign an order twice. Each process rebuilds its
+heap every REBUILD_INTERVAL seconds and when the crew changes, to take in
+the orders assigned or delivered elsewhere.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Q
+
+from .models import Order
+from .roles import DELIVERY_CREW
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "WORKER": True,
+    "BATCH_SIZE": 100,
+    "POLL_INTERVAL": 5.0,
+    "REBUILD_INTERVAL": 60.0,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "ORDER_ASSIGNMENT", {})}
+
+
+class CrewBalancer:
+    """Min-heap of (open orders, crew member id).
+
+    A changed load is pushed as a new entry; entries whose load is no
+    longer current are dropped when they reach the top.
+    """
+
+    def __init__(self):
+        self.loads = {}
+        self.heap = []
+        self.built = None
+
+    def rebuild(self):
+        self.loads = dict(
+            User.objects.filter(groups__name=DELIVERY_CREW)
+            .annotate(
+                open_orders=Count(
+                    "delivery_crew", filter=Q(delivery_crew__status=False)
+                )
+            )
+            .values_list("pk", "open_orders")
+        )
+        self.heap = [(load, crew_id) for crew_id, load in self.loads.items()]
+        heapq.heapify(self.heap)
+        self.built = time.monotonic()
+
+    def is_stale(self, max_age):
+        return self.built is None or time.monotonic() - self.built > max_age
+
+    def invalidate(self):
+        self.built = None
+
+    def pick(self):
+        """The least loaded member, now counted with one more order; None
+        without a delivery crew."""
+        while self.heap:
+            load, crew_id = self.heap[0]
+            if self.loads.get(crew_id) == load:
+                self.loads[crew_id] = load + 1
+                heapq.heapreplace(self.heap, (load + 1, crew_id))
+                return crew_id
+            heapq.heappop(self.heap)
+        return None
+
+    def release(self, crew_id, count=1):
+        if crew_id in self.loads:
+            self.loads[crew_id] -= count
+            heapq.heappush(self.heap, (self.loads[crew_id], crew_id))
+
+
+balancer = CrewBalancer()
+_lock = threading.Lock()
+
+
+def assign_pending(batch_size=None):
+    """Assigns up to `batch_size` open orders without a crew, oldest first.
+    Returns how many were assigned."""
+    config = get_config()
+    batch_size = batch_size or config["BATCH_SIZE"]
+    with _lock:
+        try:
+            with transaction.atomic():
+                return assign_batch(batch_size, config["REBUILD_INTERVAL"])
+        except Exception:
+            # The heap counted orders that were not written.
+            balancer.invalidate()
+            raise
+
+
+def assign_batch(batch_size, rebuild_interval):
+    if balancer.is_stale(rebuild_interval):
+        balancer.rebuild()
+    pending = Order.objects.filter(delivery_crew=None, status=False).order_by("pk")
+    if connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True)
+    by_crew = defaultdict(list)
+    for order_id in pending.values_list("pk", flat=True)[:batch_size]:
+        crew_id = balancer.pick()
+        if crew_id is None:
+            break
+        by_crew[crew_id].append(order_id)
+
+    assigned = 0
+    for crew_id, order_ids in by_crew.items():
+        updated = Order.objects.filter(pk__in=order_ids, delivery_crew=None).update(
+            delivery_crew_id=crew_id
+        )
+        if updated < len(order_ids):
+            # Assigned by another worker in the meantime.
+            balancer.release(crew_id, len(order_ids) - updated)
+        assigned += updated
+    return assigned
+
+
+def assign_all():
+    """Runs batches until the queue is empty or nobody can take an order."""
+    assigned = 0
+    batch_size = get_config()["BATCH_SIZE"]
+    while True:
+        count = assign_pending(batch_size)
+        assigned += count
+        if count < batch_size:
+            return assigned
+
+
+class AssignmentWorker(threading.Thread):
+    def __init__(self):
+        super().__init__(name="order-assignment", daemon=True)
+        self.wake = threading.Event()
+
+    def run(self):
+        while True:
+            self.wake.wait(get_config()["POLL_INTERVAL"])
+            self.wake.clear()
+            try:
+                assign_all()
+            except Exception:
+                logger.exception("Order assignment failed")
+            finally:
+                close_old_connections()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def notify():
+    """Wakes the worker of this process up, starting it on first use."""
+    global _worker
+    if not get_config()["WORKER"]:
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = AssignmentWorker()
+            _worker.start()
+    _worker.wake.set()
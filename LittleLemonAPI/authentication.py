@@ -0,0 +1,35 @@
+import copy
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import LRUCache
+
+# token key -> (user, token)
+token_cache = LRUCache(
+    max_entries=getattr(settings, "TOKEN_CACHE_MAX_ENTRIES", 10000),
+    ttl=getattr(settings, "TOKEN_CACHE_TTL", 5),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that keeps resolved tokens in an in-process cache.
+
+    A miss falls back to the usual Token + User query. Entries are evicted
+    when the token is deleted or the user is saved (see signals.py), in
+    this process only: other workers drop them after TOKEN_CACHE_TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        # Each request gets its own copy, so per-request state set on the
+        # user (e.g. the permission cache of ModelBackend) is not shared.
+        return copy.copy(user), token
+
+    @staticmethod
+    def stats():
+        return token_cache.stats()
@@ -0,0 +1,399 @@
+"""Per-endpoint latency, query and row budgets for the API.
+
+SCENARIOS holds one request for every route and method of the API.
+run() replays them against a dataset made by `setquickdb --scale` and
+measures, per scenario, the SQL queries, the rows they fetched and the
+latency percentiles. compare() checks the results against the committed
+baseline (benchmarks.json); `manage.py benchmarkapi --update-baseline`
+rewrites it.
+"""
+
+import io
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import seeding
+from .cache import get_menu_cache
+from .models import Category, MenuItem
+from .throttling import get_throttle_store
+from .urls import router, urlpatterns
+
+BASELINE_PATH = Path(__file__).with_name("benchmarks.json")
+DEFAULT_SCALE = {"scale": 50, "items": 200, "categories": 10}
+
+# Staff accounts created by setquickdb.
+USERS = {
+    "customer": "customer-0",
+    "checkout": "customer-1",
+    "superuser": "superuser",
+    "admin": "frankblack",
+    "manager": "alicejohnson",
+    "other_manager": "bobbrown",
+    "crew": "edwardgreen",
+    "other_crew": "fionablack",
+    "guest": "test_user",
+}
+
+
+@dataclass
+class Scenario:
+    route: str
+    method: str
+    user: str
+    label: str = ""
+    kwargs: Callable = None
+    # A dict, or a callable taking the dataset.
+    query: dict | Callable = field(default_factory=dict)
+    data: Callable = None
+    format: str = "json"
+
+    @property
+    def key(self):
+        return " ".join(filter(None, (self.route, self.method.upper(), self.label)))
+
+
+def import_file(dataset):
+    rows = "".join(f",Imported {i},9.50,,Category 0\n" for i in range(10))
+    content = f"id,title,price,featured,category\n{rows}"
+    return {"file": SimpleUploadedFile("menu.csv", content.encode())}
+
+
+SCENARIOS = [
+    Scenario("menuitem-list", "get", "customer"),
+    Scenario("menuitem-list", "get", "customer", "price", query={"ordering": "price"}),
+    Scenario("menuitem-list", "get", "customer", "search", query={"search": "pizza"}),
+    Scenario(
+        "menuitem-list", "get", "customer", "cursor", query={"pagination": "cursor"}
+    ),
+    Scenario(
+        "menuitem-list",
+        "get",
+        "customer",
+        "category",
+        query=lambda d: {
+            "category": d.category,
+            "featured": "true",
+            "ordering": "price",
+        },
+    ),
+    Scenario("menuitem-export", "get", "manager"),
+    Scenario("menuitem-export", "get", "manager", "csv", query={"file_format": "csv"}),
+    Scenario(
+        "menuitem-import-menu",
+        "post",
+        "manager",
+        data=import_file,
+        format="multipart",
+    ),
+    Scenario("menuitem-changes", "get", "customer"),
+    Scenario("menuitem-detail", "get", "customer", kwargs=lambda d: {"pk": d.item}),
+    Scenario(
+        "menuitem-detail",
+        "patch",
+        "manager",
+        kwargs=lambda d: {"pk": d.item},
+        data=lambda d: {"price": "9.99"},
+    ),
+    Scenario(
+        "menuitem-detail", "delete", "superuser", kwargs=lambda d: {"pk": d.item}
+    ),
+    Scenario("category-list", "get", "customer"),
+    Scenario(
+        "category-detail", "get", "customer", kwargs=lambda d: {"slug": d.category}
+    ),
+    Scenario("cart-list", "get", "customer"),
+    Scenario(
+        "cart-list",
+        "post",
+        "guest",
+        data=lambda d: {"menu_item": d.item, "quantity": 2},
+    ),
+    Scenario(
+        "cart-bulk",
+        "post",
+        "customer",
+        data=lambda d: [{"menu_item": pk, "quantity": 3} for pk in d.items[:10]],
+    ),
+    Scenario(
+        "cart-bulk",
+        "delete",
+        "customer",
+        data=lambda d: {"menu_items": d.items[:10]},
+    ),
+    Scenario("manager-list", "get", "manager"),
+    Scenario(
+        "manager-list", "post", "admin", data=lambda d: {"username": "test_user"}
+    ),
+    Scenario(
+        "manager-detail",
+        "delete",
+        "admin",
+        kwargs=lambda d: {"pk": d.users["other_manager"]},
+    ),
+    Scenario(
+        "manager-bulk",
+        "post",
+        "admin",
+        data=lambda d: {"users": [d.users["guest"], "customer-2", "customer-3"]},
+    ),
+    Scenario(
+        "manager-bulk",
+        "delete",
+        "admin",
+        data=lambda d: {"users": [d.users["other_manager"], "customer-2"]},
+    ),
+    Scenario("delivery-crew-list", "get", "manager"),
+    Scenario(
+        "delivery-crew-list",
+        "post",
+        "manager",
+        data=lambda d: {"username": "test_user"},
+    ),
+    Scenario(
+        "delivery-crew-detail",
+        "delete",
+        "manager",
+        kwargs=lambda d: {"pk": d.users["other_crew"]},
+    ),
+    Scenario(
+        "delivery-crew-bulk",
+        "post",
+        "manager",
+        data=lambda d: {"users": [d.users["guest"], "customer-2", "customer-3"]},
+    ),
+    Scenario(
+        "delivery-crew-bulk",
+        "delete",
+        "manager",
+        data=lambda d: {"users": [d.users["other_crew"], "customer-2"]},
+    ),
+    Scenario("orders-list", "get", "customer"),
+    Scenario("orders-list", "get", "crew", "crew"),
+    Scenario("orders-list", "get", "manager", "manager"),
+    Scenario("orders-list", "post", "checkout"),
+    Scenario("orders-export", "get", "manager"),
+    Scenario("profiles-list", "get", "admin"),
+    Scenario("api-root", "get", "customer"),
+    Scenario(
+        "token-login",
+        "post",
+        "customer",
+        data=lambda d: {"username": USERS["customer"], "password": seeding.PASSWORD},
+    ),
+]
+
+# Routes and methods deliberately left out, with the reason.
+SKIPPED = {
+    ("menuitem-changes-stream", "GET"): "held open until STREAM_TIMEOUT",
+    ("menuitem-list", "POST"): "MenuItemSerializer can't write category.title",
+    ("menuitem-detail", "PUT"): "MenuItemSerializer can't write category.title",
+}
+
+
+def router_routes():
+    """(route name, METHOD) for every route of the API router."""
+    routes = set()
+    for url in router.urls:
+        actions = getattr(url.callback, "actions", None) or {"get": None}
+        routes.update(
+            (url.name, method.upper()) for method in actions if method != "head"
+        )
+    return routes
+
+
+def api_routes():
+    """router_routes() and the other named routes of urls.py."""
+    routes = router_routes()
+    for url in urlpatterns:
+        # The router's include() has no name; the async views have no class
+        # and share the names of the DRF views they fall back to.
+        view_class = getattr(url.callback, "cls", None)
+        if getattr(url, "name", None) and view_class is not None:
+            routes.update(
+                (url.name, method.upper())
+                for method in view_class.http_method_names
+                if method not in ("head", "options") and hasattr(view_class, method)
+            )
+    return routes
+
+
+def seed(scale=50, items=200, categories=10):
+    call_command(
+        "setquickdb",
+        scale=scale,
+        items=items,
+        categories=categories,
+        stdout=io.StringIO(),
+    )
+
+
+def load_dataset():
+    users = dict(
+        User.objects.filter(username__in=USERS.values()).values_list("username", "pk")
+    )
+    return SimpleNamespace(
+        users={name: users[username] for name, username in USERS.items()},
+        items=list(MenuItem.objects.order_by("pk").values_list("pk", flat=True)),
+        item=MenuItem.objects.order_by("pk").values_list("pk", flat=True).first(),
+        # The largest category, made by the seeder.
+        category=Category.objects.with_stats()
+        .order_by("-item_count", "pk")
+        .values_list("slug", flat=True)
+        .first(),
+    )
+
+
+class QueryCounter:
+    """execute_wrapper counting the queries and the rows they fetched."""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        cursor = context["cursor"]
+        if not getattr(cursor, "_benchmark_counted", False):
+            cursor._benchmark_counted = True
+            self.count_fetches(cursor)
+        return execute(sql, params, many, context)
+
+    def count_fetches(self, cursor):
+        fetchone, fetchmany, fetchall = (
+            cursor.fetchone,
+            cursor.fetchmany,
+            cursor.fetchall,
+        )
+
+        def counted_fetchone():
+            row = fetchone()
+            self.rows += row is not None
+            return row
+
+        def counted_fetchmany(*args, **kwargs):
+            rows = fetchmany(*args, **kwargs)
+            self.rows += len(rows)
+            return rows
+
+        def counted_fetchall():
+            rows = fetchall()
+            self.rows += len(rows)
+            return rows
+
+        cursor.fetchone = counted_fetchone
+        cursor.fetchmany = counted_fetchmany
+        cursor.fetchall = counted_fetchall
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def send(client, scenario, dataset):
+    url = reverse(scenario.route, kwargs=scenario.kwargs and scenario.kwargs(dataset))
+    data = scenario.data(dataset) if scenario.data else None
+    method = getattr(client, scenario.method)
+    query = scenario.query
+    if scenario.method == "get":
+        response = method(url, query(dataset) if callable(query) else query)
+    else:
+        response = method(url, data, format=scenario.format)
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure(scenario, dataset, repeat):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user_id=dataset.users[scenario.user])
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    timings = []
+    # The first, untimed request warms the token and role caches up.
+    for _ in range(repeat + 1):
+        counter = QueryCounter()
+        # The menu cache is bypassed, so the database path is measured, and
+        # the repetitions must not hit the throttle rates.
+        get_menu_cache().bump_version()
+        get_throttle_store().clear()
+        with transaction.atomic():
+            start = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = send(client, scenario, dataset)
+            timings.append((time.perf_counter() - start) * 1000)
+            # Writes are undone so every repetition sees the same data.
+            transaction.set_rollback(True)
+        if response.status_code >= 400:
+            raise AssertionError(
+                f"{scenario.key}: HTTP {response.status_code} {response.content[:200]}"
+            )
+    timings = timings[1:]
+    return {
+        "queries": counter.queries,
+        "rows": counter.rows,
+        "p50_ms": round(percentile(timings, 0.5), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+    }
+
+
+def run(repeat=5, scenarios=SCENARIOS):
+    """Measures every scenario; the counts are those of the last repetition."""
+    dataset = load_dataset()
+    return {
+        scenario.key: measure(scenario, dataset, repeat) for scenario in scenarios
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def write_baseline(results, scale, path=BASELINE_PATH):
+    with open(path, "w") as baseline:
+        json.dump({"scale": scale, "routes": results}, baseline, indent=2)
+        baseline.write("\n")
+
+
+def compare(results, baseline, scale, latency_tolerance=None):
+    """Returns the budget violations as readable strings.
+
+    Query counts must not grow. Row counts are only compared on the scale the
+    baseline was made with, and latency only with a tolerance factor, as
+    timings depend on the machine. The median is compared: the p95 of a few
+    repetitions is mostly noise.
+    """
+    budgets = baseline["routes"]
+    same_scale = baseline["scale"] == scale
+    failures = []
+    for key, result in results.items():
+        budget = budgets.get(key)
+        if budget is None:
+            failures.append(f"{key}: no baseline, run benchmarkapi --update-baseline")
+            continue
+        if result["queries"] > budget["queries"]:
+            failures.append(
+                f"{key}: {result['queries']} queries, budget {budget['queries']}"
+            )
+        if same_scale and result["rows"] > budget["rows"]:
+            failures.append(f"{key}: {result['rows']} rows, budget {budget['rows']}")
+        latency_budget = budget["p50_ms"] * (latency_tolerance or math.inf)
+        if result["p50_ms"] > latency_budget:
+            failures.append(
+                f"{key}: p50 {result['p50_ms']} ms, budget {budget['p50_ms']} ms "
+                f"x {latency_tolerance}"
+            )
+    return failures
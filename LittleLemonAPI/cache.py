@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from .renderers import dumps
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional TTL (in seconds)."""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+    def __len__(self):
+        return len(self._data)
+
+
+def new_version():
+    """A version no other process or earlier run has used, so ETags of
+    different content never match."""
+    return time.time_ns()
+
+
+class LocMemMenuCache:
+    """In-process menu cache backend, for a single worker.
+
+    Its version only changes with the changes made in this process. With
+    `timeout` (seconds) the version is renewed that often, which bounds
+    how long changes made in other processes go unseen.
+    """
+
+    def __init__(self, max_entries=1024, timeout=None, **options):
+        self._entries = LRUCache(max_entries=max_entries)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._renew()
+
+    def _renew(self):
+        self._version = new_version()
+        self._renewed = time.monotonic()
+
+    def get_version(self):
+        if self.timeout and time.monotonic() - self._renewed > self.timeout:
+            self.bump_version()
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._renew()
+        # Entries of older versions can never be read again.
+        self._entries.clear()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value):
+        self._entries.set(key, value)
+
+    def stats(self):
+        return self._entries.stats()
+
+
+class DjangoMenuCache:
+    """Menu cache backend on top of the Django cache framework.
+
+    With a shared cache (Redis, Memcached, database) the version counter is
+    shared by all workers, so a change made in one worker is seen by all.
+    """
+
+    version_key = "menu:version"
+
+    def __init__(self, alias="default", timeout=None, **options):
+        self._cache = caches[alias]
+        self.timeout = timeout
+
+    def get_version(self):
+        # An evicted counter restarts from a new version, not from 1.
+        return self._cache.get_or_set(self.version_key, new_version, timeout=None)
+
+    def bump_version(self):
+        try:
+            self._cache.incr(self.version_key)
+        except ValueError:
+            self._cache.set(self.version_key, new_version(), timeout=None)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value, timeout=self.timeout)
+
+    def stats(self):
+        return {}
+
+
+@lru_cache(maxsize=None)
+def get_menu_cache():
+    config = dict(getattr(settings, "MENU_CACHE", {}))
+    backend = import_string(
+        config.pop("BACKEND", "LittleLemonAPI.cache.LocMemMenuCache")
+    )
+    return backend(**{key.lower(): value for key, value in config.items()})
+
+
+def menu_cache_key(request, version):
+    """Builds the key from the URL, with the sorted query string, and the
+    version. Scheme and host are part of it: pages hold absolute links."""
+    query = "&".join(
+        f"{name}={value}"
+        for name, values in sorted(request.GET.lists())
+        for value in values
+    )
+    url = f"{request.scheme}://{request.get_host()}{request.path}?{query}"
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return f"menu:{version}:{digest}"
+
+
+def menu_etag(data):
+    """ETag of a response body. It is cached with the body, and a body
+    rebuilt unchanged under a new version gets the same one."""
+    return f'W/"{hashlib.sha1(dumps(data)).hexdigest()}"'
@@ -0,0 +1,215 @@
+"""Menu change log, for clients that sync the menu incrementally.
+
+Every save or delete of a menu item (and every save of a category, for
+its items) appends a MenuChange row; its seq only grows. A client keeps
+the last seq it has seen and asks menu-items/changes/?since=<seq> for the
+current rows of the items changed since (upserts) and the ids of the
+deleted ones (tombstones). since=0 returns the whole menu, so the first
+sync and a resync use the same endpoint.
+
+Rows are appended after commit: a client never sees a change before the
+data it points to. Appends hold a lock until they commit, so seqs become
+visible in order; otherwise a reader could see seq N+1 before N commits,
+move past N and never get it. Upserts are read from the primary, as the
+log is: an item a lagging replica does not have yet would otherwise be
+sent as deleted.
+
+compact() keeps only the last row of each item and drops tombstones older
+than TOMBSTONE_DAYS. It then leaves a reset row (no menu item) at the seq
+of the last dropped tombstone: clients behind it get ResyncRequired and
+start again from 0, clients that had already seen it carry on.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import MenuChange, MenuItem
+from .renderers import chunked, dumps
+from .serializers import MenuItemSerializer
+
+DEFAULTS = {
+    "PAGE_SIZE": 500,
+    "POLL_INTERVAL": 1.0,
+    # Streams end after this many seconds; EventSource then reconnects
+    # with Last-Event-ID, so a stream holds no worker forever.
+    "STREAM_TIMEOUT": 55.0,
+    "TOMBSTONE_DAYS": 30,
+    # Whether changes/stream/ is served. A stream holds its worker until
+    # STREAM_TIMEOUT, so only turn it on under ASGI or with threaded workers.
+    "STREAM": False,
+}
+
+
+class ResyncRequired(Exception):
+    """The tombstones after `since` were compacted away."""
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "MENU_CHANGES", {})}
+
+
+# Key of the advisory lock that orders appends on PostgreSQL.
+APPEND_LOCK = 0x4D454E55
+
+
+def append(item_ids, deleted=False):
+    """Appends a change per item, right away."""
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # Sequence values are taken before commit; SQLite serializes
+            # writers anyway.
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [APPEND_LOCK])
+        for batch in chunked(item_ids, 5000):
+            MenuChange.objects.bulk_create(
+                MenuChange(menu_item_id=pk, deleted=deleted) for pk in batch
+            )
+
+
+def record(item_ids, deleted=False):
+    """Appends a change per item once the current transaction commits."""
+    item_ids = list(item_ids)
+    transaction.on_commit(lambda: append(item_ids, deleted))
+
+
+def record_category(category_id):
+    """A category title is part of its items' rows: they all change."""
+
+    def append_items():
+        append(
+            MenuItem.objects.using("default")
+            .filter(category_id=category_id)
+            .values_list("pk", flat=True)
+        )
+
+    transaction.on_commit(append_items)
+
+
+def changes_since(since, limit=None):
+    """The changes after `since`, at most `limit` log rows of them.
+
+    Returns {"seq": seq to ask from next, "more": whether more changes are
+    waiting, "upserts": [menu item rows], "deletes": [ids]}. An item
+    changed several times is sent once, as it is now.
+    """
+    limit = limit or get_config()["PAGE_SIZE"]
+    rows = list(
+        MenuChange.objects.filter(seq__gt=since)
+        .order_by("seq")
+        .values_list("seq", "menu_item_id", "deleted")[: limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    deleted = {}
+    for seq, item_id, is_deleted in rows:
+        if item_id is None:
+            if since:
+                raise ResyncRequired
+            continue
+        deleted[item_id] = is_deleted
+    changed = [item_id for item_id, is_deleted in deleted.items() if not is_deleted]
+    upserts = MenuItemSerializer.represent(
+        MenuItemSerializer.values(
+            MenuItem.objects.using("default").filter(pk__in=changed).order_by("pk")
+        )
+    )
+    # Items deleted after their last change in this page read as deleted.
+    found = {row["id"] for row in upserts}
+    return {
+        "seq": rows[-1][0] if rows else since,
+        "more": more,
+        "upserts": upserts,
+        "deletes": [
+            item_id
+            for item_id, is_deleted in deleted.items()
+            if is_deleted or item_id not in found
+        ],
+    }
+
+
+def event(page):
+    return f"id: {page['seq']}\nevent: changes\ndata: {dumps(page).decode()}\n\n"
+
+
+RESET_EVENT = "event: reset\ndata: {}\n\n"
+# Comments keep proxies from closing an idle stream and reveal clients
+# that went away.
+KEEP_ALIVE = ": keep-alive\n\n"
+
+
+def event_stream(since):
+    """Server-Sent Events: a "changes" event per page of changes, polled
+    every POLL_INTERVAL seconds, or a "reset" event when a resync is
+    needed."""
+    config = get_config()
+    deadline = time.monotonic() + config["STREAM_TIMEOUT"]
+    yield f"retry: {int(config['POLL_INTERVAL'] * 1000)}\n\n"
+    while True:
+        try:
+            page = changes_since(since)
+        except ResyncRequired:
+            yield RESET_EVENT
+            return
+        if page["seq"] != since:
+            since = page["seq"]
+            yield event(page)
+            if page["more"]:
+                continue
+        if time.monotonic() >= deadline:
+            return
+        yield KEEP_ALIVE
+        time.sleep(config["POLL_INTERVAL"])
+
+
+async def aevent_stream(since):
+    """event_stream() for ASGI, without a thread blocked between polls."""
+    config = get_config()
+    deadline = time.monotonic() + config["STREAM_TIMEOUT"]
+    yield f"retry: {int(config['POLL_INTERVAL'] * 1000)}\n\n"
+    while True:
+        try:
+            page = await sync_to_async(changes_since)(since)
+        except ResyncRequired:
+            yield RESET_EVENT
+            return
+        if page["seq"] != since:
+            since = page["seq"]
+            yield event(page)
+            if page["more"]:
+                continue
+        if time.monotonic() >= deadline:
+            return
+        yield KEEP_ALIVE
+        await asyncio.sleep(config["POLL_INTERVAL"])
+
+
+def compact(tombstone_days=None):
+    """Deletes superseded rows and expired tombstones; returns their counts."""
+    if tombstone_days is None:
+        tombstone_days = get_config()["TOMBSTONE_DAYS"]
+    newer = MenuChange.objects.filter(
+        menu_item_id=OuterRef("menu_item_id"), seq__gt=OuterRef("seq")
+    )
+    with transaction.atomic():
+        superseded, _ = MenuChange.objects.filter(Exists(newer)).delete()
+        tombstones = MenuChange.objects.filter(
+            deleted=True,
+            menu_item_id__isnull=False,
+            created__lt=timezone.now() - timedelta(days=tombstone_days),
+        )
+        watermark = tombstones.aggregate(seq=Max("seq"))["seq"]
+        expired, _ = tombstones.delete()
+        if expired:
+            # One reset row, taking the seq of the last dropped tombstone.
+            resets = MenuChange.objects.filter(menu_item_id=None)
+            watermark = max(watermark, resets.aggregate(seq=Max("seq"))["seq"] or 0)
+            resets.delete()
+            MenuChange.objects.create(seq=watermark, menu_item_id=None)
+    return {"superseded": superseded, "expired": expired}
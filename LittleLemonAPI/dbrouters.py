@@ -0,0 +1,41 @@
+import random
+
+from django.conf import settings
+
+
+class MenuReplicaRouter:
+    """Sends menu reads to the read replicas and everything else to default.
+
+    The menu changes a few times a day, so replication lag is acceptable
+    there. Responses kept in the menu cache and the change log are read
+    from default instead, as they would outlive the lag. Replicas are the
+    DATABASES aliases starting with "replica".
+    """
+
+    app_label = "LittleLemonAPI"
+    replica_models = {"menuitem", "category"}
+
+    def __init__(self):
+        self.replicas = [
+            alias for alias in settings.DATABASES if alias.startswith("replica")
+        ]
+
+    def db_for_read(self, model, **hints):
+        if (
+            self.replicas
+            and model._meta.app_label == self.app_label
+            and model._meta.model_name in self.replica_models
+        ):
+            return random.choice(self.replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        # Without this, saving an instance read from a replica would write
+        # to that replica.
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
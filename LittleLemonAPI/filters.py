@@ -0,0 +1,24 @@
+from django.db.models import Value
+from rest_framework.filters import BaseFilterBackend
+
+from .serializers import MenuItemFilterSerializer
+
+
+class MenuItemFilter(BaseFilterBackend):
+    """Exact ?category=<slug> and ?featured=true|false filters.
+
+    Both go through the (category, featured, price) index; the slug is
+    matched on the unique index of Category.slug.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = MenuItemFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        filters = filters.validated_data
+        if "category" in filters:
+            queryset = queryset.filter(category__slug=filters["category"])
+        if filters.get("featured") is not None:
+            # featured=True compiles to a bare "featured" condition, which
+            # SQLite can't match against the index.
+            queryset = queryset.filter(featured=Value(filters["featured"]))
+        return queryset
@@ -0,0 +1,143 @@
+"""Token login with password hashing off the request thread.
+
+A login is one query for the user, its password hash and its token, and
+a password check on a bounded pool of hashing threads (PBKDF2, argon2
+and bcrypt release the GIL while hashing). When MAX_PENDING checks are
+already queued the login is refused at once with 503 instead of tying
+the worker up. Under ASGI the check is awaited, so it blocks no thread of
+the event loop or of the sync views. Under WSGI the request thread still
+waits for it: with sync gunicorn workers each login holds a worker.
+
+The existing token is returned without a write; only a first login
+creates one. A password stored with another hasher than the first of
+PASSWORD_HASHERS (or with fewer iterations) is hashed again on a
+successful login when REHASH is on.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+DEFAULTS = {
+    "WORKERS": min(4, os.cpu_count() or 1),
+    "MAX_PENDING": 32,
+    "TIMEOUT": 10.0,
+    "REHASH": True,
+}
+
+INVALID_CREDENTIALS = "Unable to log in with provided credentials."
+BUSY = "Too many logins in progress, try again shortly."
+
+
+class InvalidCredentials(Exception):
+    pass
+
+
+class Busy(Exception):
+    """The hashing pool is full or did not answer within TIMEOUT."""
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "LOGIN", {})}
+
+
+class HashingPool:
+    def __init__(self, workers, max_pending, timeout):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="hashing")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.timeout = timeout
+
+    def submit(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise Busy
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(lambda future: self.slots.release())
+        return future
+
+    def run(self, function, *args):
+        try:
+            return self.submit(function, *args).result(self.timeout)
+        except TimeoutError:
+            raise Busy
+
+    async def arun(self, function, *args):
+        future = asyncio.wrap_future(self.submit(function, *args))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except TimeoutError:
+            raise Busy
+
+
+@lru_cache(maxsize=None)
+def get_hashing_pool():
+    config = get_config()
+    return HashingPool(config["WORKERS"], config["MAX_PENDING"], config["TIMEOUT"])
+
+
+def find_user(username):
+    """(id, password hash, is_active, token key or None), or None."""
+    return (
+        User.objects.filter(**{User.USERNAME_FIELD: username})
+        .values_list("pk", "password", "is_active", "auth_token__key")
+        .first()
+    )
+
+
+def check(password, encoded, rehash):
+    """Runs on the pool; returns (valid, new hash or None)."""
+    if encoded is None:
+        # Hash anyway, so unknown usernames take as long as wrong passwords.
+        make_password(password)
+        return False, None
+    valid, must_update = verify_password(password, encoded)
+    if valid and must_update and rehash:
+        return True, make_password(password)
+    return valid, None
+
+
+def finish(user, new_encoded):
+    """Stores the new hash, if any; returns the token key."""
+    pk, encoded, _, key = user
+    if new_encoded is not None:
+        # Unless the password was changed meanwhile.
+        User.objects.filter(pk=pk, password=encoded).update(password=new_encoded)
+        if key is not None:
+            token_cache.delete(key)
+    if key is None:
+        try:
+            key = Token.objects.create(user_id=pk).key
+        except IntegrityError:
+            # Created by a concurrent first login.
+            key = Token.objects.values_list("key", flat=True).get(user_id=pk)
+    return key
+
+
+def login(username, password):
+    user = find_user(username)
+    valid, new_encoded = get_hashing_pool().run(
+        check, password, user and user[1], get_config()["REHASH"]
+    )
+    if not valid or not user[2]:
+        raise InvalidCredentials
+    return finish(user, new_encoded)
+
+
+async def alogin(username, password):
+    user = await sync_to_async(find_user)(username)
+    valid, new_encoded = await get_hashing_pool().arun(
+        check, password, user and user[1], get_config()["REHASH"]
+    )
+    if not valid or not user[2]:
+        raise InvalidCredentials
+    return await sync_to_async(finish)(user, new_encoded)
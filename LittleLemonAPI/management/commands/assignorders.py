@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from LittleLemonAPI.assignment import assign_all, get_config
+
+
+class Command(BaseCommand):
+    help = """Assigns the open orders without a delivery crew to the least
+    loaded crew members. With --loop, keeps polling for new orders."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+
+    def handle(self, *args, **options):
+        while True:
+            assigned = assign_all()
+            if assigned or not options["loop"]:
+                self.stdout.write(f"{assigned} order(s) assigned.")
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(get_config()["POLL_INTERVAL"])
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from LittleLemonAPI import benchmark
+
+
+class Command(BaseCommand):
+    help = """Measures latency, SQL queries and rows fetched for every API
+    route on a dataset generated by setquickdb --scale and checks them
+    against the committed baseline. Runs against a throwaway test database."""
+
+    def add_arguments(self, parser):
+        defaults = benchmark.DEFAULT_SCALE
+        parser.add_argument("--scale", type=int, default=defaults["scale"])
+        parser.add_argument("--items", type=int, default=defaults["items"])
+        parser.add_argument("--categories", type=int, default=defaults["categories"])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1.5,
+            help="Allowed p50 latency as a multiple of the baseline.",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help=f"Write the results to {benchmark.BASELINE_PATH.name}.",
+        )
+
+    def handle(self, *args, **options):
+        scale = {
+            name: options[name] for name in ("scale", "items", "categories")
+        }
+        # Allows the test client's host, as under the test runner.
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            benchmark.seed(**scale)
+            results = benchmark.run(repeat=options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'route':<40}{'queries':>8}{'rows':>8}{'p50, ms':>10}{'p95, ms':>10}"
+        )
+        for key, result in results.items():
+            self.stdout.write(
+                f"{key:<40}{result['queries']:>8}{result['rows']:>8}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            )
+
+        if options["update_baseline"]:
+            benchmark.write_baseline(results, scale)
+            self.stdout.write(f"Baseline written to {benchmark.BASELINE_PATH}.")
+            return
+        failures = benchmark.compare(
+            results, benchmark.load_baseline(), scale, options["tolerance"]
+        )
+        if failures:
+            raise CommandError("Budgets exceeded:\n" + "\n".join(failures))
+        self.stdout.write("All budgets met.")
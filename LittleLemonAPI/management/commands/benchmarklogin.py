@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.views import ObtainAuthToken
+
+from LittleLemonAPI.views import LoginView
+
+PASSWORD = "benchmark-password"
+
+VIEWS = {
+    # DRF's view, as token/login/ was served before login.py.
+    "before": ObtainAuthToken.as_view(throttle_classes=[]),
+    "after": LoginView.as_view(throttle_classes=[]),
+}
+
+
+def log_in(view, username):
+    request = RequestFactory().post(
+        "/api/token/login/",
+        {"username": username, "password": PASSWORD},
+        content_type="application/json",
+    )
+    response = view(request)
+    if response.status_code != 200:
+        raise AssertionError(f"HTTP {response.status_code} {response.data}")
+
+
+def log_in_thread(view, usernames):
+    try:
+        for username in usernames:
+            log_in(view, username)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = """Measures token logins per second and the queries and writes per
+    login, for DRF's login view (before) and LoginView (after), with as many
+    threads as a worker serves. Runs against a throwaway test database."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--logins", type=int, default=100)
+        parser.add_argument(
+            "--concurrency", type=int, default=4, help="Threads of the worker."
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'view':<10}{'logins/s':>10}{'queries':>10}{'writes':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10}{result['logins_per_s']:>10.1f}"
+                f"{result['queries']:>10}{result['writes']:>10}"
+            )
+
+    def run(self, options):
+        # Hashed once: every user has the same, real password hash.
+        encoded = make_password(PASSWORD)
+        usernames = [f"login-{i}" for i in range(options["users"])]
+        User.objects.bulk_create(
+            User(username=username, password=encoded) for username in usernames
+        )
+        # Logged in before: the token exists, as for most logins.
+        Token.objects.bulk_create(
+            Token(key=Token.generate_key(), user=user) for user in User.objects.all()
+        )
+
+        results = {}
+        for name, view in VIEWS.items():
+            log_in(view, usernames[0])
+            with CaptureQueriesContext(connection) as queries:
+                log_in(view, usernames[0])
+            writes = sum(
+                not query["sql"].lstrip().upper().startswith("SELECT")
+                for query in queries
+            )
+
+            concurrency = options["concurrency"]
+            logins = [
+                usernames[i % len(usernames)] for i in range(options["logins"])
+            ]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                for future in [
+                    executor.submit(log_in_thread, view, logins[i::concurrency])
+                    for i in range(concurrency)
+                ]:
+                    future.result()
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                "logins_per_s": len(logins) / elapsed,
+                "queries": len(queries),
+                "writes": writes,
+            }
+        return results
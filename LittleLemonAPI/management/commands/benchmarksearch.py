@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from LittleLemonAPI.models import Category, MenuItem
+from LittleLemonAPI.search import get_search_backend
+
+words = (
+    "grilled", "roasted", "spicy", "garlic", "lemon", "truffle", "smoked",
+    "crispy", "chicken", "salmon", "ribeye", "shrimp", "mushroom", "tomato",
+    "basil", "pesto", "risotto", "pizza", "salad", "soup", "burger", "tart",
+)  # fmt: skip
+
+queries = ("pizza", "gril", "lemon salmon", "truffleino", "dish12", "sou")
+
+
+class Command(BaseCommand):
+    help = """Compares the menu search backend with the LIKE-based SearchFilter
+    on a generated menu. Runs against a throwaway test database."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options["items"])
+            self.report(options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, count):
+        rng = random.Random(0)
+        # A real catalogue has many distinct words, so most terms are selective.
+        vocabulary = list(words) + [
+            f"{a}{b}" for a in words for b in ("ino", "etta", "ello", "ata", "oni")
+        ] + [f"dish{i}" for i in range(2000)]
+        categories = Category.objects.bulk_create(
+            Category(slug=f"category-{i}", title=f"{rng.choice(words)} {i}")
+            for i in range(50)
+        )
+        MenuItem.objects.bulk_create(
+            (
+                MenuItem(
+                    title=" ".join(rng.sample(vocabulary, 3)),
+                    price=rng.randint(100, 5000) / 100,
+                    featured=False,
+                    category=rng.choice(categories),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        get_search_backend().rebuild()
+
+    def report(self, repeat):
+        backend = get_search_backend()
+        queryset = MenuItem.objects.select_related("category")
+        self.stdout.write(f"{'query':<18}{'like, ms':>10}{'index, ms':>11}{'hits':>8}")
+        for query in queries:
+            terms = query.split()
+            like = queryset
+            for term in terms:
+                like = like.filter(
+                    Q(title__icontains=term) | Q(category__title__icontains=term)
+                )
+            indexed = backend.search(queryset, terms).order_by("-search_rank")
+            self.stdout.write(
+                f"{query:<18}"
+                f"{self.measure(like, repeat):>10.2f}"
+                f"{self.measure(indexed, repeat):>11.2f}"
+                f"{indexed.count():>8}"
+            )
+
+    def measure(self, queryset, repeat):
+        """Median time to count the matches and fetch the first page."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count()
+            list(queryset[:5])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
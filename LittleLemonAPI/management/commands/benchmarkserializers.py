@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from LittleLemonAPI.models import Cart, Category, MenuItem
+from LittleLemonAPI.serializers import CartSerializer, MenuItemSerializer
+
+
+class Command(BaseCommand):
+    help = """Compares MenuItemSerializer/CartSerializer with their .values()
+    fast path on generated rows. Runs against a throwaway test database."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = self.seed(options["items"])
+            menu = MenuItem.objects.select_related("category").order_by("id")
+            cart = Cart.objects.filter(user=user).with_prices().order_by("id")
+            self.stdout.write(
+                f"{'per ' + str(options['items']) + ' rows':<16}"
+                f"{'serializer, ms':>16}{'fast path, ms':>16}{'speedup':>9}"
+            )
+            for name, serializer, queryset in (
+                ("menu items", MenuItemSerializer, menu),
+                ("cart", CartSerializer, cart),
+            ):
+                slow = self.measure(
+                    lambda: serializer(queryset.all(), many=True).data,
+                    options["repeat"],
+                )
+                fast = self.measure(
+                    lambda: serializer.represent(serializer.values(queryset.all())),
+                    options["repeat"],
+                )
+                self.stdout.write(
+                    f"{name:<16}{slow:>16.2f}{fast:>16.2f}{slow / fast:>8.1f}x"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, count):
+        rng = random.Random(0)
+        user = User.objects.create_user(username="benchmark")
+        categories = Category.objects.bulk_create(
+            Category(slug=f"category-{i}", title=f"Category {i}") for i in range(20)
+        )
+        items = MenuItem.objects.bulk_create(
+            MenuItem(
+                title=f"Item {i}",
+                price=rng.randint(100, 5000) / 100,
+                featured=rng.random() < 0.1,
+                category=rng.choice(categories),
+            )
+            for i in range(count)
+        )
+        Cart.objects.bulk_create(
+            Cart(user=user, menu_item=item, quantity=rng.randint(1, 5))
+            for item in items
+        )
+        return user
+
+    def measure(self, serialize, repeat):
+        """Median time of the query plus the serialization."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serialize()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
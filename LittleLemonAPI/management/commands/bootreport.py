@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so every import is a cold one.
+SCRIPT = """
+import io, json, sys, time
+
+start = time.perf_counter()
+from LittleLemon.wsgi import application
+from LittleLemonAPI import warmup
+ready = time.perf_counter()
+
+path, host, token = sys.argv[1:4]
+environ = {
+    "REQUEST_METHOD": "GET",
+    "PATH_INFO": path,
+    "QUERY_STRING": "",
+    "SERVER_NAME": host,
+    "SERVER_PORT": "80",
+    "HTTP_HOST": host,
+    "HTTP_ACCEPT": "application/json",
+    "wsgi.input": io.BytesIO(),
+    "wsgi.url_scheme": "http",
+}
+if token:
+    environ["HTTP_AUTHORIZATION"] = f"Token {token}"
+statuses = []
+response = application(environ, lambda status, headers: statuses.append(status))
+b"".join(response)
+response.close()
+done = time.perf_counter()
+print(json.dumps({
+    "app_ready_ms": round((ready - start) * 1000, 2),
+    "first_response_ms": round((done - ready) * 1000, 2),
+    "status": statuses[0],
+    "warmup": warmup.report,
+}))
+"""
+
+
+def parse_importtime(lines):
+    """{module: self time in ms} from `python -X importtime` output."""
+    times = {}
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(self_us) / 1000
+    return times
+
+
+class Command(BaseCommand):
+    help = """Boots the WSGI app in a new process and reports the import time
+    per module, the warm-up steps and the time to the first response."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/menu-items/")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--token", default="", help="Auth token to send.")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT]
+            + [options["path"], options["host"], options["token"]],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "WARMUP": os.environ.get("WARMUP", "1")},
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        report = json.loads(result.stdout.splitlines()[-1])
+        imports = parse_importtime(result.stderr.splitlines())
+        packages = defaultdict(float)
+        for name, ms in imports.items():
+            packages[name.split(".")[0]] += ms
+        report["import_ms"] = round(sum(imports.values()), 2)
+        report["packages"] = {
+            name: round(ms, 2)
+            for name, ms in sorted(packages.items(), key=lambda p: -p[1])
+        }
+        report["modules"] = {
+            name: round(ms, 2)
+            for name, ms in sorted(imports.items(), key=lambda m: -m[1])[
+                : options["top"]
+            ]
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"app ready {report['app_ready_ms']} ms (imports "
+            f"{report['import_ms']} ms), first response "
+            f"{report['first_response_ms']} ms ({report['status']})"
+        )
+        for title, timings in (
+            ("warm-up", report["warmup"]),
+            ("packages", dict(list(report["packages"].items())[: options["top"]])),
+            ("modules", report["modules"]),
+        ):
+            self.stdout.write(f"\n{title}:")
+            for name, ms in timings.items():
+                self.stdout.write(f"  {name:<50} {ms:>10.2f} ms")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.changelog import compact
+
+
+class Command(BaseCommand):
+    help = """Compacts the menu change log: keeps the last change of each menu
+    item and drops tombstones older than --tombstone-days."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tombstone-days",
+            type=int,
+            help="Defaults to MENU_CHANGES['TOMBSTONE_DAYS'].",
+        )
+
+    def handle(self, *args, **options):
+        deleted = compact(options["tombstone_days"])
+        self.stdout.write(
+            f"{deleted['superseded']} superseded change(s) and "
+            f"{deleted['expired']} expired tombstone(s) deleted."
+        )
@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.menuio import FORMATS, export_rows, write_rows
+from LittleLemonAPI.models import MenuItem
+
+
+class Command(BaseCommand):
+    help = """Exports all menu items as CSV or JSON Lines, to a file or stdout."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+
+    def handle(self, *args, **options):
+        rows = export_rows(MenuItem.objects.order_by("id"))
+        lines = write_rows(rows, options["format"])
+        if options["path"] is None:
+            sys.stdout.writelines(lines)
+            return
+        with open(options["path"], "w", encoding="utf-8", newline="") as output:
+            output.writelines(lines)
@@ -0,0 +1,38 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from LittleLemonAPI.menuio import FORMATS, InvalidFile, MenuImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = """Imports menu items from a CSV or JSON Lines file with the columns
+    id (optional), title, price, featured and category."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="Defaults to the file extension."
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or options["path"].rsplit(".", 1)[-1]
+        if file_format not in FORMATS:
+            raise CommandError(f"Unknown format {file_format!r}, use --format.")
+
+        start = time.perf_counter()
+        with open(options["path"], "rb") as stream:
+            try:
+                report = MenuImporter(options["chunk_size"]).run(
+                    read_rows(stream, file_format)
+                )
+            except InvalidFile as exc:
+                raise CommandError(f"Nothing imported. {exc}")
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            f"Imported {report['imported']} rows, skipped {report['error_count']} "
+            f"invalid rows in {time.perf_counter() - start:.1f}s."
+        )
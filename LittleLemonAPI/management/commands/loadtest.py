@@ -0,0 +1,87 @@
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = """Sends GET requests to a running server and reports throughput
+    and latency percentiles. Run it once against the WSGI server and once
+    against the ASGI server with the same number of workers, e.g.
+
+        gunicorn LittleLemon.wsgi -w 4
+        gunicorn LittleLemon.asgi -w 4 -k uvicorn.workers.UvicornWorker
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", nargs="+", help="URLs to request in turn.")
+        parser.add_argument("--token", help="Auth token of the client.")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        urls = [urlsplit(url) for url in options["url"]]
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        def client(number):
+            local_latencies = []
+            local_errors = 0
+            connection = None
+            request = number
+            while time.monotonic() < deadline:
+                url = urls[request % len(urls)]
+                request += 1
+                if connection is None:
+                    connection = http.client.HTTPConnection(url.netloc, timeout=30)
+                start = time.perf_counter()
+                try:
+                    connection.request(
+                        "GET", f"{url.path}?{url.query}", headers=headers
+                    )
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    local_errors += 1
+                    connection.close()
+                    connection = None
+                    continue
+                local_latencies.append(time.perf_counter() - start)
+                if response.status >= 400:
+                    local_errors += 1
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        threads = [
+            threading.Thread(target=client, args=(number,))
+            for number in range(options["concurrency"])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        if not latencies:
+            self.stderr.write("No successful requests.")
+            return
+        latencies.sort()
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"requests: {len(latencies)}, errors: {sum(errors)}\n"
+            f"throughput: {len(latencies) / elapsed:.1f} req/s\n"
+            f"latency p50: {quantiles[49] * 1000:.1f} ms, "
+            f"p99: {quantiles[98] * 1000:.1f} ms, "
+            f"max: {latencies[-1] * 1000:.1f} ms"
+        )
@@ -1,8 +1,11 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User, Group, Permission
 from rest_framework.authtoken.models import Token
 
 from LittleLemonAPI.models import Category, MenuItem
+from LittleLemonAPI.seeding import Seeder
 
 restaurant_staff = (
     # ["login", "password", "group"]
@@ -49,9 +52,41 @@ menu_items = (
 
 class Command(BaseCommand):
     help = """Creates superuser, admin groups, managers, delivery people,
-    menu item database with categories."""
+    menu item database with categories.
+
+    With --scale N it also generates N customers with tokens, carts and
+    orders and a synthetic menu, e.g. --scale 200000 for a million cart rows.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=0, help="Customers.")
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--cart-size", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=1, help="Per customer.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.seed_staff()
+        if options["scale"]:
+            start = time.perf_counter()
+            counts = Seeder(
+                options["scale"],
+                items=options["items"],
+                categories=options["categories"],
+                cart_size=options["cart_size"],
+                orders=options["orders"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+                log=self.stdout.write,
+            ).run()
+            self.stdout.write(
+                ", ".join(f"{count} {name}" for name, count in counts.items())
+                + f" in {time.perf_counter() - start:.1f}s."
+            )
 
-    def handle(self, *args, **kwargs):
+    def seed_staff(self):
         # Creates a superuser if not.
         if not User.objects.filter(username="superuser").exists():
             User.objects.create_superuser(
@@ -81,9 +116,9 @@ class Command(BaseCommand):
                 employee.groups.add(group)
 
                 if role in group_permissions:
-                    for codename in group_permissions[role]:
-                        permission = Permission.objects.get(codename=codename)
-                        group.permissions.add(permission)
+                    group.permissions.add(
+                        *Permission.objects.filter(codename__in=group_permissions[role])
+                    )
 
             # creates tokens
             token, _ = Token.objects.get_or_create(user=employee)
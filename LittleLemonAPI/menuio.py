@@ -0,0 +1,237 @@
+"""Bulk import and export of the menu in CSV and JSON Lines.
+
+Rows have the columns id (optional), title, price, featured and category
+(the category title). Rows with an id update that menu item, rows without
+one create a new item.
+"""
+
+import csv
+import io
+import json
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from . import changelog
+from .cache import get_menu_cache
+from .models import Category, MenuItem
+from .search import get_search_backend
+from .serializers import MenuItemSerializer
+
+FIELDS = ("id", "title", "price", "featured", "category")
+FORMATS = ("csv", "jsonl")
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/jsonl"}
+
+
+class InvalidFile(ValueError):
+    """The file can't be read at all: not UTF-8, or not CSV."""
+
+
+def read_rows(stream, file_format):
+    """Yields row dicts from a binary or text stream, one line at a time.
+
+    Raises InvalidFile while iterating when the file can't be decoded; the
+    import then stops and its transaction is rolled back.
+    """
+    if isinstance(stream, io.TextIOBase):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        try:
+            yield from reader
+        except csv.Error as exc:
+            raise InvalidFile(f"Line {reader.line_num}: {exc}.")
+        except UnicodeDecodeError:
+            raise InvalidFile(f"Line {reader.line_num + 1}: not UTF-8.")
+    elif file_format == "jsonl":
+        number = 0
+        try:
+            for number, line in enumerate(text, start=1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        row = None
+                    yield row if isinstance(row, dict) else {"__invalid__": line}
+        except UnicodeDecodeError:
+            raise InvalidFile(f"Line {number + 1}: not UTF-8.")
+    else:
+        raise ValueError(f"Unknown format {file_format!r}, expected one of {FORMATS}")
+
+
+class RowSerializer(serializers.Serializer):
+    # Fields are only used for parsing; see MenuImporter.parse().
+    # The primary key is a BigAutoField.
+    id = serializers.IntegerField(
+        min_value=1, max_value=2**63 - 1, allow_null=True, default=None
+    )
+    title = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2)
+    featured = serializers.BooleanField(required=False, default=False)
+    category = serializers.CharField(max_length=255)
+
+
+class MenuImporter:
+    """Upserts menu rows in chunks of bulk_create(update_conflicts=True).
+
+    Every row is validated with the same rules as MenuItemSerializer; invalid
+    rows are skipped and reported with their line number.
+    """
+
+    max_errors = 1000
+
+    def __init__(self, chunk_size=5000):
+        self.chunk_size = chunk_size
+        self.fields = RowSerializer().fields
+        self.validate_price = MenuItemSerializer().validate_price
+        # Category title -> id, loaded once and extended as rows add new ones.
+        self.categories = {}
+        # Taken slugs, for the categories the rows add.
+        self.slugs = set()
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, number, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "errors": errors})
+
+    def parse(self, number, row):
+        """Returns the cleaned row, or None after recording its errors."""
+        if "__invalid__" in row:
+            self.add_error(number, ["Invalid JSON object."])
+            return None
+        cleaned, errors = {}, {}
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if value == "" or value is None:
+                value = serializers.empty
+            try:
+                cleaned[name] = field.run_validation(value)
+                if name == "price":
+                    cleaned[name] = self.validate_price(cleaned[name])
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+        if errors:
+            self.add_error(number, errors)
+            return None
+        return cleaned
+
+    def run(self, rows):
+        with transaction.atomic():
+            categories = Category.objects.values_list("title", "id", "slug")
+            self.categories = {title: pk for title, pk, _ in categories}
+            self.slugs = {slug for _, _, slug in categories}
+            chunk = []
+            for number, row in enumerate(rows, start=1):
+                cleaned = self.parse(number, row)
+                if cleaned is not None:
+                    chunk.append(cleaned)
+                if len(chunk) >= self.chunk_size:
+                    self.flush(chunk)
+                    chunk = []
+            self.flush(chunk)
+            self.reset_sequence()
+            transaction.on_commit(get_menu_cache().bump_version)
+
+        backend = get_search_backend()
+        if backend is not None:
+            backend.rebuild()
+        return {
+            "imported": self.imported,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+    def flush(self, chunk):
+        if not chunk:
+            return
+        missing = {row["category"] for row in chunk} - self.categories.keys()
+        if missing:
+            created = Category.objects.bulk_create(
+                Category(title=title, slug=self.unique_slug(title)) for title in missing
+            )
+            if any(category.pk is None for category in created):
+                # Backends that cannot return ids from bulk inserts.
+                created = Category.objects.filter(title__in=missing)
+            self.categories.update(
+                (category.title, category.pk) for category in created
+            )
+
+        items = [
+            MenuItem(
+                id=row["id"],
+                title=row["title"],
+                price=row["price"],
+                featured=row["featured"],
+                category_id=self.categories[row["category"]],
+            )
+            for row in chunk
+        ]
+        # Rows for existing ids are updated, the others are inserted. A
+        # repeated id keeps its last row, as one statement can't update a
+        # row twice.
+        with_id = list({item.id: item for item in items if item.id}.values())
+        without_id = [item for item in items if item.id is None]
+        if with_id:
+            MenuItem.objects.bulk_create(
+                with_id,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=["title", "price", "featured", "category"],
+            )
+        MenuItem.objects.bulk_create(without_id)
+        # bulk_create sends no signals. Backends that can't return the new
+        # ids leave them out of the change log.
+        changelog.record(item.pk for item in items if item.pk is not None)
+        self.imported += len(items)
+
+    def unique_slug(self, title):
+        # Different titles can share a slug ("Café", "Cafe").
+        base = slugify(title) or "category"
+        slug, number = base, 1
+        while slug in self.slugs:
+            number += 1
+            slug = f"{base}-{number}"
+        self.slugs.add(slug)
+        return slug
+
+    def reset_sequence(self):
+        # Explicit ids do not advance the id sequence on e.g. PostgreSQL.
+        statements = connection.ops.sequence_reset_sql(no_style(), [MenuItem])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def export_rows(queryset):
+    """Yields one dict per menu item in FIELDS order, reading in chunks."""
+    rows = queryset.values_list(
+        "id", "title", "price", "featured", "category__title"
+    ).iterator(chunk_size=5000)
+    for row in rows:
+        yield dict(zip(FIELDS, row))
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def write_rows(rows, file_format):
+    """Yields the export as text, one line at a time."""
+    if file_format == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            yield writer.writerow(row.values())
+    elif file_format == "jsonl":
+        for row in rows:
+            yield json.dumps({**row, "price": str(row["price"])}) + "\n"
+    else:
+        raise ValueError(f"Unknown format {file_format!r}, expected one of {FORMATS}")
@@ -0,0 +1,285 @@
+"""In-process request metrics in the Prometheus text format.
+
+MetricsMiddleware counts requests and records their latency per route, the
+URL name given by the DefaultRouter (e.g. "menuitem-list"). Cache hit
+counters and database pool stats are collected when a snapshot is taken.
+
+Each process has its own registry. With METRICS["DIRECTORY"] set, every
+worker writes its snapshot to <directory>/<pid>.json (at most once per
+FLUSH_INTERVAL seconds) and /metrics adds up the snapshots of all workers
+of the host. Counters of exited workers are kept, their gauges dropped.
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .authentication import token_cache
+from .cache import get_menu_cache
+from .roles import permission_cache, role_cache
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "DIRECTORY": None,
+    "FLUSH_INTERVAL": 1.0,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "METRICS", {})}
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Thread-safe counters and histograms, keyed by name and labels."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counters = defaultdict(float)
+        # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self.histograms = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._flushed = 0.0
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self.counters[name, label_key(labels)] += value
+
+    def observe(self, name, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            key = name, label_key(labels)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(self.buckets) + 2)
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def collector(self, function):
+        """Registers `function()`, yielding (type, name, labels, value)."""
+        self.collectors.append(function)
+        return function
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                [name, labels, value] for (name, labels), value in self.counters.items()
+            ]
+            histograms = [
+                [name, labels, list(values)]
+                for (name, labels), values in self.histograms.items()
+            ]
+        gauges = []
+        for collect in self.collectors:
+            for kind, name, labels, value in collect():
+                entry = [name, label_key(labels), value]
+                (counters if kind == "counter" else gauges).append(entry)
+        return {
+            "pid": os.getpid(),
+            "buckets": self.buckets,
+            "counters": counters,
+            "histograms": histograms,
+            "gauges": gauges,
+        }
+
+    def flush(self, directory, force=False):
+        """Writes the snapshot for the other workers, atomically."""
+        now = time.monotonic()
+        if not force and now - self._flushed < get_config()["FLUSH_INTERVAL"]:
+            return
+        self._flushed = now
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        temporary = directory / f"{os.getpid()}.{threading.get_ident()}.tmp"
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def load_snapshots(directory):
+    snapshots = []
+    for path in Path(directory).glob("*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # Removed or being replaced by its worker.
+    return snapshots
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    gauges = defaultdict(float)
+    histograms = {}
+    buckets = BUCKETS
+    for snapshot in snapshots:
+        buckets = tuple(snapshot["buckets"])
+        for name, labels, value in snapshot["counters"]:
+            counters[name, tuple(map(tuple, labels))] += value
+        if snapshot["pid"] == os.getpid() or pid_alive(snapshot["pid"]):
+            for name, labels, value in snapshot["gauges"]:
+                gauges[name, tuple(map(tuple, labels))] += value
+        for name, labels, values in snapshot["histograms"]:
+            key = name, tuple(map(tuple, labels))
+            merged = histograms.setdefault(key, [0] * len(values))
+            histograms[key] = [a + b for a, b in zip(merged, values)]
+    return buckets, counters, gauges, histograms
+
+
+def collect():
+    """The snapshots of this process, or of all workers in DIRECTORY."""
+    directory = get_config()["DIRECTORY"]
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(directory, force=True)
+    return load_snapshots(directory)
+
+
+def format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshots):
+    buckets, counters, gauges, histograms = merge(snapshots)
+    lines = []
+
+    def group(kind, samples):
+        seen = set()
+        for (name, labels), value in sorted(samples.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+    group("counter", counters)
+    ratios = {}
+    for (name, labels), hits in counters.items():
+        if name == "cache_hits_total":
+            total = hits + counters.get(("cache_misses_total", labels), 0)
+            ratios["cache_hit_ratio", labels] = hits / total if total else 0.0
+    group("gauge", {**gauges, **ratios})
+
+    seen = set()
+    for (name, labels), values in sorted(histograms.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, count in zip((*buckets, math.inf), values):
+            cumulative += count
+            le = format_value(bound if bound == math.inf else float(bound))
+            lines.append(f"{name}_bucket{format_labels(labels, le=le)} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(values[-1])}")
+        lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+@registry.collector
+def cache_stats():
+    caches = {
+        "menu": get_menu_cache(),
+        "role": role_cache,
+        "permission": permission_cache,
+        "token": token_cache,
+    }
+    for name, cache in caches.items():
+        stats = cache.stats()
+        if "hits" in stats:
+            yield "counter", "cache_hits_total", {"cache": name}, stats["hits"]
+            yield "counter", "cache_misses_total", {"cache": name}, stats["misses"]
+            yield "gauge", "cache_entries", {"cache": name}, stats["size"]
+
+
+@registry.collector
+def db_pool_stats():
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        if not settings_dict.get("OPTIONS", {}).get("pool"):
+            continue
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            for stat, value in pool.get_stats().items():
+                yield "gauge", f"db_pool_{stat}", {"alias": alias}, value
+
+
+class MetricsMiddleware:
+    """Counts requests and records their latency per route and method."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.directory = config["DIRECTORY"]
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, duration):
+        match = request.resolver_match
+        # Unmatched paths share one label, so scans can't add series.
+        route = (match.url_name or match.view_name) if match else "unmatched"
+        labels = {"route": route, "method": request.method}
+        registry.inc(
+            "http_requests_total", {**labels, "status": str(response.status_code)}
+        )
+        registry.observe("http_request_duration_seconds", labels, duration)
+        if self.directory:
+            registry.flush(self.directory)
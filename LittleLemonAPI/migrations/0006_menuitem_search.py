@@ -0,0 +1,49 @@
+from django.db import migrations
+
+FTS_TABLE = "LittleLemonAPI_menuitem_fts"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if ("ENABLE_FTS5",) not in cursor.fetchall():
+                return
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE "{FTS_TABLE}" USING fts5('
+            "title, category, tokenize='unicode61 remove_diacritics 2', "
+            "prefix='2 3')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO "{FTS_TABLE}" (rowid, title, category) '
+            "SELECT item.id, item.title, category.title "
+            'FROM "LittleLemonAPI_menuitem" item '
+            'JOIN "LittleLemonAPI_category" category '
+            "ON category.id = item.category_id"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS menuitem_title_trgm "
+            'ON "LittleLemonAPI_menuitem" USING gin (title gin_trgm_ops)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{FTS_TABLE}"')
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS menuitem_title_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0005_order_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
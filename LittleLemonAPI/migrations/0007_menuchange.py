@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def log_existing_items(apps, schema_editor):
+    # Every item gets a first change, so ?since=0 returns the whole menu.
+    MenuItem = apps.get_model("LittleLemonAPI", "MenuItem")
+    MenuChange = apps.get_model("LittleLemonAPI", "MenuChange")
+    MenuChange.objects.bulk_create(
+        (
+            MenuChange(menu_item_id=pk)
+            for pk in MenuItem.objects.order_by("pk").values_list("pk", flat=True)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0006_menuitem_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('menu_item_id', models.BigIntegerField(null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['menu_item_id', 'seq'], name='menuchange_item_seq')],
+            },
+        ),
+        migrations.RunPython(log_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def deduplicate_slugs(apps, schema_editor):
+    # Repeated slugs get the category id appended before they become unique.
+    Category = apps.get_model("LittleLemonAPI", "Category")
+    seen = set()
+    for category in Category.objects.order_by("pk"):
+        if category.slug in seen:
+            category.slug = f"{category.slug}-{category.pk}"
+            category.save(update_fields=["slug"])
+        seen.add(category.slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0007_menuchange'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['category', 'featured', 'price'], name='menuitem_category_featured'),
+        ),
+        migrations.AlterField(
+            model_name='menuitem',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='LittleLemonAPI.category'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Same document as PostgresSearchBackend.update().
+DOCUMENT = (
+    "setweight(to_tsvector('english'::regconfig, item.title), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, category.title), 'B')"
+)
+
+
+def create_search_vector(apps, schema_editor):
+    # A PostgreSQL-only column, so it is not a model field.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        'ALTER TABLE "LittleLemonAPI_menuitem" '
+        "ADD COLUMN IF NOT EXISTS search_vector tsvector"
+    )
+    schema_editor.execute(
+        f'UPDATE "LittleLemonAPI_menuitem" item SET search_vector = {DOCUMENT} '
+        'FROM "LittleLemonAPI_category" category '
+        "WHERE category.id = item.category_id"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS menuitem_search_vector "
+        'ON "LittleLemonAPI_menuitem" USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS menuitem_search_vector")
+    schema_editor.execute(
+        'ALTER TABLE "LittleLemonAPI_menuitem" DROP COLUMN IF EXISTS search_vector'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0008_category_slug_menuitem_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
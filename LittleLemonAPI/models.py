@@ -1,11 +1,25 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Sum
 from django.contrib.auth.models import User  # noqa: F401
+from django.utils import timezone
+
+
+class CategoryQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Item count and price range of each category, in one grouped query."""
+        return self.annotate(
+            item_count=Count("menuitem"),
+            min_price=Min("menuitem__price"),
+            max_price=Max("menuitem__price"),
+        )
 
 
 class Category(models.Model):
-    slug = models.SlugField()
+    slug = models.SlugField(unique=True)
     title = models.CharField(max_length=255, db_index=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -14,25 +28,79 @@ class MenuItem(models.Model):
     title = models.CharField(max_length=255, db_index=True)
     price = models.DecimalField(max_digits=6, decimal_places=2, db_index=True)
     featured = models.BooleanField(db_index=True)
-    category = models.ForeignKey(Category, on_delete=models.PROTECT)
+    # Indexed by the composite index below, which starts with the category.
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, db_index=False)
+
+    class Meta:
+        indexes = [
+            # ?category=...&featured=true&ordering=price, and the category
+            # aggregates.
+            models.Index(
+                fields=["category", "featured", "price"],
+                name="menuitem_category_featured",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class MenuChange(models.Model):
+    """Append-only log of menu item changes, see changelog.py.
+
+    menu_item_id is not a foreign key, so tombstones outlive their item. A
+    row without a menu item marks tombstones dropped by compaction.
+    """
+
+    seq = models.BigAutoField(primary_key=True)
+    menu_item_id = models.BigIntegerField(null=True)
+    deleted = models.BooleanField(default=False)
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Compaction looks for newer rows of the same item.
+            models.Index(fields=["menu_item_id", "seq"], name="menuchange_item_seq"),
+        ]
+
+
+LINE_PRICE = ExpressionWrapper(
+    F("quantity") * F("menu_item__price"),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+class CartQuerySet(models.QuerySet):
+    def with_prices(self):
+        """Joins the menu item and computes the line price in the same query."""
+        return self.select_related("menu_item").annotate(line_price=LINE_PRICE)
+
+    def total_price(self):
+        """Sum of all line prices, computed by the database."""
+        return self.aggregate(total=Sum(LINE_PRICE))["total"] or 0
+
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.PositiveSmallIntegerField(default=1)
 
+    objects = CartQuerySet.as_manager()
+
     @property
     def price(self):
+        # Use the annotated value when the row came from with_prices().
+        line_price = self.__dict__.get("line_price")
+        if line_price is not None:
+            return line_price
         return self.quantity * self.menu_item.price
 
     @staticmethod
-    def get_total_price(user):
-        cart_items = Cart.objects.filter(user=user)
-        return sum(item.price for item in cart_items)
+    def get_total_price(user, cart_items=None):
+        # Already fetched rows are summed in Python without a new query.
+        if cart_items is not None:
+            return sum(item.price for item in cart_items)
+        return Cart.objects.filter(user=user).total_price()
 
     class Meta:
         # unique_together = ("menu_item", "user")
@@ -41,24 +109,89 @@ class Cart(models.Model):
         ]
 
 
-# class Order(models.Model):
-#     user = models.ForeignKey(User, on_delete=models.CASCADE)
-#     delivery_crew = models.ForeignKey(
-#         User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True
-#     )
-#     status = models.BooleanField(db_index=True, default=False)
-#     total = models.DecimalField(max_digits=6, decimal_places=2)
-#     date = models.DateField(db_index=True)
+class OrderTooLarge(Exception):
+    """The order total does not fit Order.total."""
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        """Loads the order items and their menu items in one extra query."""
+        return self.prefetch_related(
+            models.Prefetch(
+                "items", queryset=OrderItem.objects.select_related("menu_item")
+            )
+        )
+
+
+class Order(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    delivery_crew = models.ForeignKey(
+        User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True
+    )
+    status = models.BooleanField(db_index=True, default=False)
+    # As wide as LINE_PRICE: a cart line can reach 32767 x 9999.99.
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    date = models.DateField(db_index=True, default=timezone.localdate)
 
+    objects = OrderQuerySet.as_manager()
 
-# class OrderItem(models.Model):
-#     order = models.ForeignKey(
-#         Order, on_delete=models.CASCADE
-#     )  # there should be a binding to the Order model here.
-#     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
-#     quantity = models.SmallIntegerField()
-#     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
-#     price = models.DecimalField(max_digits=6, decimal_places=2)
+    MAX_TOTAL = 10**10
 
-#     class Meta:
-#         unique_together = ("order", "menu_item")
+    class Meta:
+        indexes = [
+            # Delivery crew and manager listings filtered by status.
+            models.Index(
+                fields=["delivery_crew", "status", "date"],
+                name="order_crew_status_date",
+            ),
+            # Customer order history.
+            models.Index(fields=["user", "date"], name="order_user_date"),
+        ]
+
+    @staticmethod
+    def create_from_cart(user):
+        """Turns the user's cart into an order. Returns None for an empty cart,
+        raises OrderTooLarge when the total reaches MAX_TOTAL."""
+        with transaction.atomic():
+            # Concurrent checkouts of the same user wait here (where the
+            # database supports row locks).
+            cart_items = list(
+                Cart.objects.select_for_update(of=("self",))
+                .filter(user=user)
+                .with_prices()
+            )
+            if not cart_items:
+                return None
+
+            total = Cart.get_total_price(user, cart_items)
+            if total >= Order.MAX_TOTAL:
+                raise OrderTooLarge
+            order = Order.objects.create(user=user, total=total)
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order,
+                    menu_item_id=item.menu_item_id,
+                    quantity=item.quantity,
+                    unit_price=item.menu_item.price,
+                    price=item.price,
+                )
+                for item in cart_items
+            )
+            deleted, _ = Cart.objects.filter(
+                pk__in=[item.pk for item in cart_items]
+            ).delete()
+            if deleted != len(cart_items):
+                # Another checkout has already consumed these cart rows.
+                raise IntegrityError("The cart has already been checked out.")
+        return order
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.SmallIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = ("order", "menu_item")
@@ -0,0 +1,172 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination over a composite, unique ordering.
+
+    The cursor holds the ordering values of the last row of a page, so the
+    next page is a plain indexed range query: no COUNT(*) and no OFFSET.
+    The last field of `ordering` must be unique (usually the primary key).
+    """
+
+    page_size = 20
+    page_size_query_param = None
+    max_page_size = None
+    ordering = ("-id",)
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[: page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            if not isinstance(last, dict):
+                last = vars(last)
+            self.next_position = [last[field.lstrip("-")] for field in self.ordering]
+        return rows
+
+    def after(self, position):
+        """Rows that come after `position` in `ordering`."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors come from clients: each value must fit its field.
+        values = []
+        for name, value in zip(self.ordering, position):
+            field = model._meta.get_field(name.lstrip("-"))
+            try:
+                value = field.to_python(value)
+                if value is None:
+                    raise ValueError
+                field.run_validators(value)
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, position):
+        encoded = base64.urlsafe_b64encode(json.dumps(position, default=str).encode())
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded.decode()
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-date", "-id")
+
+
+class UserPagination(KeysetPagination):
+    ordering = ("id",)
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class MenuItemCursorPagination(KeysetPagination):
+    """Keyset pages over (price, id), backed by the index on price."""
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Follow the direction chosen by OrderingFilter (?ordering=-price).
+        if queryset.query.order_by[:1] == ("-price",):
+            self.ordering = ("-price", "-id")
+        else:
+            self.ordering = ("price", "id")
+        return super().paginate_queryset(queryset, request, view)
+
+
+class MenuItemPagination(PageNumberPagination):
+    """Page numbers with a client-chosen ?page_size=, or keyset pages.
+
+    Keyset pages are used with ?pagination=cursor and when following their
+    links. They skip the COUNT(*) query of page numbers.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_class = MenuItemCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        if (
+            request.query_params.get("pagination") == "cursor"
+            or self.cursor_class.cursor_query_param in request.query_params
+        ):
+            self.cursor = self.cursor_class()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
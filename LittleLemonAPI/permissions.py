@@ -1,15 +1,14 @@
 from rest_framework import permissions
 
+from .roles import ADMINS, MANAGERS, DELIVERY_CREW, get_user_permissions, has_role
+
 
 class IsAdminOrManager(permissions.BasePermission):
     def has_permission(self, request, view):
         return (
             request.user
             and request.user.is_authenticated
-            and (
-                request.user.groups.filter(name="Admins").exists()
-                or request.user.groups.filter(name="Managers").exists()
-            )
+            and has_role(request, ADMINS, MANAGERS)
         )
 
 class IsManagerOrDeliveryCrew(permissions.BasePermission):
@@ -17,8 +16,17 @@ class IsManagerOrDeliveryCrew(permissions.BasePermission):
         return (
             request.user
             and request.user.is_authenticated
-            and (
-                request.user.groups.filter(name="Managers").exists()
-                or request.user.groups.filter(name="Delivery_Crew").exists()
-            )
+            and has_role(request, MANAGERS, DELIVERY_CREW)
         )
+
+
+class CachedDjangoModelPermissions(permissions.DjangoModelPermissions):
+    """DjangoModelPermissions that reads the permission set from the role cache."""
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        queryset = self._queryset(view)
+        perms = self.get_required_permissions(request.method, queryset.model)
+        return not perms or get_user_permissions(request.user).issuperset(perms)
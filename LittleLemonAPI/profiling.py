@@ -0,0 +1,183 @@
+"""Opt-in per-request SQL and timing profile.
+
+A sampled request records its wall time, query count, total SQL time, the
+slowest statements and the statements repeated more than
+N_PLUS_ONE_THRESHOLD times (usually an N+1 lookup). The profile is sent
+in a Server-Timing header, logged as one JSON line and kept in a ring
+buffer that staff can read from /api/profiles/.
+
+With SAMPLE_RATE 0 the middleware removes itself from the stack.
+Queries run while a streaming response is being sent are not recorded.
+"""
+
+import heapq
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "SAMPLE_RATE": 0.0,
+    "SLOW_QUERIES": 5,
+    "N_PLUS_ONE_THRESHOLD": 5,
+    "BUFFER_SIZE": 200,
+}
+
+# Profile of the request being handled, also seen by sync_to_async threads.
+current_profile = ContextVar("current_profile", default=None)
+profiles = deque(maxlen=DEFAULTS["BUFFER_SIZE"])
+
+_placeholders = re.compile(r"\((?:%s, )+%s\)")
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "REQUEST_PROFILING", {})}
+
+
+def sql_shape(sql):
+    """The statement with IN lists of any length folded into one shape."""
+    return _placeholders.sub("(%s, ...)", sql)
+
+
+class Profile:
+    def __init__(self, request, config):
+        self.method = request.method
+        self.path = request.path
+        self.slow_queries = config["SLOW_QUERIES"]
+        self.threshold = config["N_PLUS_ONE_THRESHOLD"]
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.slowest = []
+        self.shapes = Counter()
+
+    def record(self, sql, duration):
+        self.query_count += 1
+        self.sql_time += duration
+        self.shapes[sql_shape(sql)] += 1
+        entry = (duration, self.query_count, sql)
+        if len(self.slowest) < self.slow_queries:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def finish(self, status_code):
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": status_code,
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "query_count": self.query_count,
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "slowest": [
+                {"sql": sql, "ms": round(duration * 1000, 2)}
+                for duration, _, sql in sorted(self.slowest, reverse=True)
+            ],
+            "n_plus_one": [
+                {"sql": shape, "count": count}
+                for shape, count in self.shapes.most_common()
+                if count > self.threshold
+            ],
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, time.perf_counter() - start)
+
+
+def install_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_wrappers(**kwargs):
+    # Connections opened before the middleware was loaded. request_started
+    # runs in the thread where the ORM runs, under ASGI too.
+    for connection in connections.all(initialized_only=True):
+        install_wrapper(connection)
+
+
+def server_timing(data):
+    return (
+        f"app;dur={data['wall_ms']}, "
+        f'db;dur={data["sql_ms"]};desc="{data["query_count"]} queries"'
+    )
+
+
+class RequestProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config["SAMPLE_RATE"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        global profiles
+        if profiles.maxlen != self.config["BUFFER_SIZE"]:
+            profiles = deque(profiles, maxlen=self.config["BUFFER_SIZE"])
+        connection_created.connect(install_wrapper)
+        request_started.connect(install_wrappers)
+
+    def sampled(self):
+        rate = self.config["SAMPLE_RATE"]
+        return rate >= 1 or random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        profile = Profile(request, self.config)
+        token = current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.report(profile, response)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        profile = Profile(request, self.config)
+        token = current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.report(profile, response)
+
+    def report(self, profile, response):
+        data = profile.finish(response.status_code)
+        response["Server-Timing"] = server_timing(data)
+        profiles.append(data)
+        level = logging.WARNING if data["n_plus_one"] else logging.INFO
+        logger.log(level, json.dumps(data))
+        return response
+
+
+def recent_profiles():
+    """Newest first."""
+    return list(reversed(profiles))
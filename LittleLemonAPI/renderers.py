@@ -0,0 +1,109 @@
+import decimal
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is used instead.
+    orjson = None
+
+
+_encoder = JSONEncoder()
+_fallback_renderer = JSONRenderer()
+
+
+def encode_default(obj):
+    """Types orjson does not know, encoded the way DRF's JSONEncoder does."""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return _encoder.default(obj)
+
+
+def dumps(data):
+    """Compact JSON bytes, same output as DRF's JSONRenderer."""
+    if orjson is None:
+        return _fallback_renderer.render(data)
+    content = orjson.dumps(
+        data,
+        default=encode_default,
+        # Row errors are keyed by index; datetimes are left to DRF's encoder.
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+    # Like JSONRenderer, keep the output a strict JavaScript subset.
+    if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028")
+        content = content.replace(b"\xe2\x80\xa9", b"\\u2029")
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    Indented output (e.g. "Accept: application/json; indent=4") still goes
+    through the stdlib encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Text exposition format; error bodies are still sent as JSON."""
+
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode()
+        return dumps(data)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets views stream text/event-stream; error bodies are sent as JSON."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return dumps(data)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def stream_json_list(rows, represent, chunk_size=2000):
+    """Yields a JSON array of `represent(chunk)` items, one chunk at a time.
+
+    `rows` should be lazy, e.g. queryset.iterator(chunk_size), so only one
+    chunk is held in memory whatever the size of the result.
+    """
+    yield b"["
+    separator = b""
+    for chunk in chunked(rows, chunk_size):
+        items = represent(chunk)
+        if items:
+            yield separator + b",".join(dumps(item) for item in items)
+            separator = b","
+    yield b"]"
+
+
+def streaming_json_response(queryset, represent, chunk_size=2000):
+    return StreamingHttpResponse(
+        stream_json_list(
+            queryset.iterator(chunk_size=chunk_size), represent, chunk_size
+        ),
+        content_type="application/json",
+    )
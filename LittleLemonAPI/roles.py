@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+
+from .cache import LRUCache
+
+ADMINS = "Admins"
+MANAGERS = "Managers"
+DELIVERY_CREW = "Delivery_Crew"
+
+# user id -> frozenset of group names / permission strings.
+role_cache = LRUCache(
+    max_entries=getattr(settings, "ROLE_CACHE_MAX_ENTRIES", 4096),
+    ttl=getattr(settings, "ROLE_CACHE_TTL", 60),
+)
+permission_cache = LRUCache(
+    max_entries=getattr(settings, "ROLE_CACHE_MAX_ENTRIES", 4096),
+    ttl=getattr(settings, "ROLE_CACHE_TTL", 60),
+)
+
+# group name -> group id, for membership writes.
+group_cache = LRUCache(max_entries=64, ttl=getattr(settings, "ROLE_CACHE_TTL", 60))
+
+
+def get_group_id(name):
+    """Id of the named group, created on first use."""
+    group_id = group_cache.get(name)
+    if group_id is None:
+        group_id = Group.objects.get_or_create(name=name)[0].pk
+        group_cache.set(name, group_id)
+    return group_id
+
+
+def get_user_roles(user):
+    """Group names of the user, cached across requests for ROLE_CACHE_TTL."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = role_cache.get(user.pk)
+    if roles is None:
+        roles = frozenset(user.groups.values_list("name", flat=True))
+        role_cache.set(user.pk, roles)
+    return roles
+
+
+def get_user_permissions(user):
+    """Same as user.get_all_permissions(), cached across requests."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    perms = permission_cache.get(user.pk)
+    if perms is None:
+        perms = frozenset(user.get_all_permissions())
+        permission_cache.set(user.pk, perms)
+    return perms
+
+
+def request_roles(request):
+    """Group names of request.user, resolved at most once per request."""
+    roles = getattr(request, "_user_roles", None)
+    if roles is None:
+        roles = get_user_roles(request.user)
+        request._user_roles = roles
+    return roles
+
+
+def has_role(request, *names):
+    return not request_roles(request).isdisjoint(names)
+
+
+def invalidate_user(user_id=None):
+    """Drops cached roles of one user, or of everyone if user_id is None."""
+    for cache in (role_cache, permission_cache):
+        if user_id is None:
+            cache.clear()
+        else:
+            cache.delete(user_id)
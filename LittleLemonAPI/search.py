@@ -0,0 +1,180 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+from rest_framework.filters import SearchFilter
+
+from .models import Category, MenuItem
+
+FTS_TABLE = "LittleLemonAPI_menuitem_fts"
+
+
+class SearchBackend:
+    """Index hooks called by the signals; no-ops for backends without a copy."""
+
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+    def index(self, item):
+        pass
+
+    def unindex(self, item):
+        pass
+
+    def index_category(self, category):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Ranked prefix search through an FTS5 table over item and category titles.
+
+    The table is created by migration 0006 and kept in sync by signals.
+    Bulk writes that skip signals should call rebuild() afterwards.
+    """
+
+    # bm25 column weights: a hit in the title counts more than the category.
+    weights = (10.0, 1.0)
+
+    def search(self, queryset, terms):
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        item_table = MenuItem._meta.db_table
+        weights = ", ".join(str(weight) for weight in self.weights)
+        return queryset.extra(
+            select={"search_rank": f'-bm25("{FTS_TABLE}", {weights})'},
+            tables=[FTS_TABLE],
+            where=[
+                f'"{FTS_TABLE}".rowid = "{item_table}"."id"',
+                f'"{FTS_TABLE}" MATCH %s',
+            ],
+            params=[match],
+        )
+
+    def index(self, item):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO "{FTS_TABLE}" (rowid, title, category) '
+                "VALUES (%s, %s, %s)",
+                [item.pk, item.title, item.category.title],
+            )
+
+    def unindex(self, item):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [item.pk])
+
+    def index_category(self, category):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{FTS_TABLE}" SET category = %s WHERE rowid IN '
+                f'(SELECT id FROM "{MenuItem._meta.db_table}" WHERE category_id = %s)',
+                [category.title, category.pk],
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}"')
+            cursor.execute(
+                f'INSERT INTO "{FTS_TABLE}" (rowid, title, category) '
+                "SELECT item.id, item.title, category.title "
+                f'FROM "{MenuItem._meta.db_table}" item '
+                f'JOIN "{Category._meta.db_table}" category '
+                "ON category.id = item.category_id"
+            )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Full-text prefix search, plus trigram matches on titles for typos.
+
+    Both conditions use an index: the search_vector column (migration 0009,
+    GIN) holds the weighted item and category titles, and `title % text`
+    uses the pg_trgm index of migration 0006. The column is kept in sync by
+    signals; bulk writes that skip them should call rebuild() afterwards.
+    """
+
+    config = "english"
+
+    def search(self, queryset, terms):
+        words = [word for word in (re.sub(r"\W", "", term) for term in terms) if word]
+        if not words:
+            return queryset
+        query = " & ".join(f"{word}:*" for word in words)
+        text = " ".join(words)
+        table = MenuItem._meta.db_table
+        vector = f'"{table}"."search_vector"'
+        title = f'"{table}"."title"'
+        tsquery = "to_tsquery(%s::regconfig, %s)"
+        return queryset.extra(
+            select={
+                "search_rank": f"ts_rank({vector}, {tsquery}) + similarity({title}, %s)"
+            },
+            select_params=[self.config, query, text],
+            # `%` matches above pg_trgm.similarity_threshold (0.3 by default).
+            where=[f"({vector} @@ {tsquery} OR {title} %% %s)"],
+            params=[self.config, query, text],
+        )
+
+    def update(self, condition="", params=()):
+        document = (
+            "setweight(to_tsvector(%s::regconfig, item.title), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, category.title), 'B')"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{MenuItem._meta.db_table}" item '
+                f"SET search_vector = {document} "
+                f'FROM "{Category._meta.db_table}" category '
+                f"WHERE category.id = item.category_id{condition}",
+                [self.config, self.config, *params],
+            )
+
+    def index(self, item):
+        self.update(" AND item.id = %s", [item.pk])
+
+    def index_category(self, category):
+        self.update(" AND category.id = %s", [category.pk])
+
+    def rebuild(self):
+        self.update()
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Backend from MENU_SEARCH_BACKEND, or picked by the database engine.
+
+    Returns None when there is no index to use, e.g. SQLite without FTS5.
+    """
+    path = getattr(settings, "MENU_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if (
+        connection.vendor == "sqlite"
+        and FTS_TABLE in connection.introspection.table_names()
+    ):
+        return SQLiteFTSBackend()
+    return None
+
+
+class MenuSearchFilter(SearchFilter):
+    """SearchFilter that goes through the search backend when there is one.
+
+    Without an explicit ?ordering= the results are ranked by relevance.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        backend = get_search_backend()
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = backend.search(queryset, terms)
+        if "ordering" not in request.query_params:
+            queryset = queryset.order_by("-search_rank", "id")
+        return queryset
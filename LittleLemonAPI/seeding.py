@@ -0,0 +1,215 @@
+"""Synthetic data for load tests and benchmarks.
+
+Everything is written with batched bulk_create and generated from one
+seeded random.Random, so the same arguments always give the same dataset.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import changelog
+from .cache import get_menu_cache
+from .models import Cart, Category, MenuItem, Order, OrderItem
+from .renderers import chunked
+from .roles import DELIVERY_CREW
+from .search import get_search_backend
+
+USERNAME_PREFIX = "customer-"
+PASSWORD = "customer-pass"
+FIRST_ORDER_DATE = date(2024, 1, 1)
+
+dishes = (
+    "Bruschetta", "Salad", "Pizza", "Carbonara", "Ribeye", "Bisque", "Tiramisu",
+    "Cheesecake", "Risotto", "Lasagne", "Burger", "Tart", "Soup", "Gnocchi",
+)  # fmt: skip
+styles = (
+    "Grilled", "Roasted", "Spicy", "Garlic", "Lemon", "Truffle", "Smoked",
+    "Crispy", "House", "Classic",
+)  # fmt: skip
+
+
+class Seeder:
+    """Generates `customers` users with tokens, carts and orders on top of a
+    menu of `items` items in `categories` categories."""
+
+    def __init__(
+        self,
+        customers,
+        items=1000,
+        categories=20,
+        cart_size=5,
+        orders=1,
+        seed=0,
+        batch_size=10000,
+        log=None,
+    ):
+        self.customers = customers
+        self.items = items
+        self.categories = categories
+        self.cart_size = min(cart_size, items)
+        self.orders = orders
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def run(self):
+        with transaction.atomic():
+            for step in (self.seed_menu, self.seed_users, self.seed_carts):
+                start = time.perf_counter()
+                step()
+                self.log(f"{step.__name__}: {time.perf_counter() - start:.1f}s")
+            if self.orders:
+                start = time.perf_counter()
+                self.seed_orders()
+                self.log(f"seed_orders: {time.perf_counter() - start:.1f}s")
+            transaction.on_commit(get_menu_cache().bump_version)
+
+        backend = get_search_backend()
+        if backend is not None:
+            backend.rebuild()
+        return self.counts
+
+    def bulk_create(self, model, objs):
+        """bulk_create in batches without building the whole list first."""
+        created = []
+        for batch in chunked(objs, self.batch_size):
+            created += model.objects.bulk_create(batch)
+        self.counts[model._meta.model_name] = (
+            self.counts.get(model._meta.model_name, 0) + len(created)
+        )
+        return created
+
+    def insert_rows(self, model, fields, rows):
+        """executemany() of plain tuples, for the big tables whose ids are not
+        needed: it skips building a model instance per row."""
+        quote = connection.ops.quote_name
+        columns = ", ".join(
+            quote(model._meta.get_field(name).column) for name in fields
+        )
+        sql = (
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))})"
+        )
+        count = 0
+        with connection.cursor() as cursor:
+            for batch in chunked(rows, self.batch_size):
+                cursor.executemany(sql, batch)
+                count += len(batch)
+        self.counts[model._meta.model_name] = (
+            self.counts.get(model._meta.model_name, 0) + count
+        )
+
+    def seed_menu(self):
+        rng = self.rng
+        offset = Category.objects.count()
+        categories = self.bulk_create(
+            Category,
+            (
+                Category(slug=f"category-{offset + i}", title=f"Category {offset + i}")
+                for i in range(self.categories)
+            ),
+        )
+        items = self.bulk_create(
+            MenuItem,
+            (
+                MenuItem(
+                    title=f"{rng.choice(styles)} {rng.choice(dishes)} {i}",
+                    price=Decimal(rng.randint(300, 5000)) / 100,
+                    featured=rng.random() < 0.05,
+                    category=rng.choice(categories),
+                )
+                for i in range(self.items)
+            ),
+        )
+        self.menu = [(item.pk, item.price) for item in items]
+        changelog.append(pk for pk, _ in self.menu)
+
+    def seed_users(self):
+        # One hash shared by all synthetic users: they can still log in with
+        # PASSWORD, but seeding doesn't spend a PBKDF2 run per user.
+        password = make_password(PASSWORD)
+        offset = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        last_pk = User.objects.aggregate(last=Max("pk"))["last"] or 0
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        self.insert_rows(
+            User,
+            ("username", "password", "email", "first_name", "last_name")
+            + ("is_staff", "is_active", "is_superuser", "date_joined"),
+            (
+                (f"{USERNAME_PREFIX}{offset + i}", password, "", "", "")
+                + (False, True, False, now)
+                for i in range(self.customers)
+            ),
+        )
+        self.user_ids = list(
+            User.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        self.insert_rows(
+            Token,
+            ("key", "user", "created"),
+            (
+                (f"{self.rng.getrandbits(160):040x}", user_id, now)
+                for user_id in self.user_ids
+            ),
+        )
+
+    def seed_carts(self):
+        rng = self.rng
+        self.insert_rows(
+            Cart,
+            ("user", "menu_item", "quantity"),
+            (
+                (user_id, item_id, rng.randint(1, 3))
+                for user_id in self.user_ids
+                for item_id, _ in rng.sample(self.menu, self.cart_size)
+            ),
+        )
+
+    def seed_orders(self):
+        rng = self.rng
+        crew = list(
+            User.objects.filter(groups__name=DELIVERY_CREW).values_list("id", flat=True)
+        )
+        lines = {}
+
+        def orders():
+            for user_id in self.user_ids:
+                for _ in range(self.orders):
+                    order_lines = [
+                        (item_id, price, rng.randint(1, 3))
+                        for item_id, price in rng.sample(self.menu, rng.randint(1, 4))
+                    ]
+                    total = sum(price * quantity for _, price, quantity in order_lines)
+                    order = Order(
+                        user_id=user_id,
+                        delivery_crew_id=rng.choice(crew) if crew else None,
+                        status=rng.random() < 0.5,
+                        total=total,
+                        date=FIRST_ORDER_DATE + timedelta(days=rng.randrange(365)),
+                    )
+                    lines[id(order)] = order_lines
+                    yield order
+
+        for batch in chunked(orders(), self.batch_size):
+            created = self.bulk_create(Order, batch)
+            self.insert_rows(
+                OrderItem,
+                ("order", "menu_item", "quantity", "unit_price", "price"),
+                (
+                    (order.pk, item_id, quantity, price, price * quantity)
+                    for order in created
+                    for item_id, price, quantity in lines.pop(id(order))
+                ),
+            )
@@ -1,7 +1,88 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import MenuItem, Cart
-from django.db import IntegrityError
+from rest_framework.relations import PKOnlyObject
+from .models import Category, MenuItem, Cart, Order, OrderItem
+from django.db import IntegrityError, models, transaction
+
+
+class ValuesSerializerMixin:
+    """Read-only fast path for list responses.
+
+    Rows are fetched with .values() using `values_lookups` (field name ->
+    lookup) and only each field's to_representation() runs on them, so the
+    output matches the serializer without building model instances.
+    """
+
+    values_lookups = {}
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.values_lookups.values())
+
+    @classmethod
+    def represent(cls, rows):
+        lookups = cls.values_lookups
+        converters = [
+            (field.field_name, lookups[field.field_name], cls.converter(field))
+            for field in cls()._readable_fields
+        ]
+        return [
+            {
+                name: None if row[lookup] is None else convert(row[lookup])
+                for name, lookup, convert in converters
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def converter(field):
+        if isinstance(field, serializers.RelatedField):
+            # Related fields expect an object with a pk, as DRF passes them.
+            return lambda pk: field.to_representation(PKOnlyObject(pk))
+        return field.to_representation
+
+
+class UserReferenceField(serializers.Field):
+    """A user id (JSON number) or username (JSON string)."""
+
+    default_error_messages = {"invalid": "Expected a user id or a username."}
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            return ("id", data)
+        if isinstance(data, str) and data:
+            return ("username", data)
+        self.fail("invalid")
+
+
+class GroupMembersSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=UserReferenceField(), allow_empty=False, max_length=1000
+    )
+
+    def validate_users(self, references):
+        """Resolves the references to user ids with one query."""
+        ids = {value for kind, value in references if kind == "id"}
+        usernames = {value for kind, value in references if kind == "username"}
+        found = User.objects.filter(
+            models.Q(id__in=ids) | models.Q(username__in=usernames)
+        ).values_list("id", "username")
+        by_id = {user_id for user_id, _ in found}
+        by_username = {username: user_id for user_id, username in found}
+        unknown = sorted(map(str, ids - by_id)) + sorted(usernames - by_username.keys())
+        if unknown:
+            raise serializers.ValidationError(f"Unknown users: {', '.join(unknown)}.")
+        return list(
+            dict.fromkeys(
+                value if kind == "id" else by_username[value]
+                for kind, value in references
+            )
+        )
+
+
+class LoginSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(trim_whitespace=False)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,8 +95,15 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class MenuItemSerializer(serializers.ModelSerializer):
+class MenuItemSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     category = serializers.CharField(source="category.title")
+    values_lookups = {
+        "id": "id",
+        "category": "category__title",
+        "title": "title",
+        "price": "price",
+        "featured": "featured",
+    }
 
     class Meta:
         model = MenuItem
@@ -35,7 +123,43 @@ class MenuItemSerializer(serializers.ModelSerializer):
         return value
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CategorySerializer(ValuesSerializerMixin, serializers.ModelSerializer):
+    # Needs a queryset annotated by Category.objects.with_stats().
+    item_count = serializers.IntegerField(read_only=True)
+    min_price = serializers.DecimalField(max_digits=6, decimal_places=2, read_only=True)
+    max_price = serializers.DecimalField(max_digits=6, decimal_places=2, read_only=True)
+    values_lookups = {
+        "slug": "slug",
+        "title": "title",
+        "item_count": "item_count",
+        "min_price": "min_price",
+        "max_price": "max_price",
+    }
+
+    class Meta:
+        model = Category
+        fields = (
+            "slug",
+            "title",
+            "item_count",
+            "min_price",
+            "max_price",
+        )
+
+
+class MenuItemFilterSerializer(serializers.Serializer):
+    category = serializers.SlugField(required=False)
+    featured = serializers.BooleanField(required=False, default=None, allow_null=True)
+
+
+class CartSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
+    # Needs a queryset annotated by Cart.objects.with_prices().
+    values_lookups = {
+        "menu_item": "menu_item",
+        "quantity": "quantity",
+        "price": "line_price",
+    }
+
     class Meta:
         model = Cart
         fields = (
@@ -44,13 +168,12 @@ class CartSerializer(serializers.ModelSerializer):
             "price",
         )
         read_only_fields = ("price",)  # Automatically calculated
-
-    def validate_menu_item(self, value):
-        try:
-            MenuItem.objects.get(id=value.id)
-        except MenuItem.DoesNotExist:
-            raise serializers.ValidationError("This menu item does not exist")
-        return value
+        # The related field already looks the menu item up.
+        extra_kwargs = {
+            "menu_item": {
+                "error_messages": {"does_not_exist": "This menu item does not exist"}
+            }
+        }
 
     def validate_quantity(self, value):
         if value <= 0:
@@ -71,3 +194,99 @@ class CartSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "This item has already been added to your cart."
             )
+
+
+class CartBulkListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        # All menu items are checked with one query; errors are keyed by row.
+        ids = {item["menu_item"] for item in attrs}
+        existing = set(MenuItem.objects.filter(id__in=ids).values_list("id", flat=True))
+        errors = {
+            index: {"menu_item": ["This menu item does not exist"]}
+            for index, item in enumerate(attrs)
+            if item["menu_item"] not in existing
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        # A menu item repeated in one request keeps its last quantity.
+        rows = {item["menu_item"]: item for item in validated_data}
+        carts = [
+            Cart(
+                user=item["user"],
+                menu_item_id=item["menu_item"],
+                quantity=item["quantity"],
+            )
+            for item in rows.values()
+        ]
+        with transaction.atomic():
+            return Cart.objects.bulk_create(
+                carts,
+                update_conflicts=True,
+                unique_fields=["menu_item", "user"],
+                update_fields=["quantity"],
+            )
+
+
+class CartBulkItemSerializer(serializers.Serializer):
+    menu_item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=32767, default=1)
+
+    class Meta:
+        list_serializer_class = CartBulkListSerializer
+
+
+class CartBulkDeleteSerializer(serializers.Serializer):
+    menu_items = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source="menu_item.title", read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = (
+            "menu_item",
+            "title",
+            "quantity",
+            "unit_price",
+            "price",
+        )
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = (
+            "id",
+            "user",
+            "delivery_crew",
+            "status",
+            "total",
+            "date",
+            "items",
+        )
+        read_only_fields = ("user", "total", "date")
+
+
+class MenuChangesSerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+
+
+class OrderFilterSerializer(serializers.Serializer):
+    # Without default=None a missing query param would read as False.
+    status = serializers.BooleanField(required=False, default=None, allow_null=True)
+    date = serializers.DateField(required=False)
+    delivery_crew = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("status") is None:
+            attrs.pop("status", None)
+        return attrs
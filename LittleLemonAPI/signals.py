@@ -0,0 +1,108 @@
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from . import assignment, changelog
+from .authentication import token_cache
+from .cache import get_menu_cache
+from .models import Category, MenuItem
+from .roles import group_cache, invalidate_user
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_menu_version(sender, **kwargs):
+    # Bump after commit so no request caches rows of an unfinished transaction.
+    transaction.on_commit(get_menu_cache().bump_version)
+
+
+@receiver(post_save, sender=MenuItem)
+def log_menu_item_change(sender, instance, **kwargs):
+    changelog.record([instance.pk])
+
+
+@receiver(post_delete, sender=MenuItem)
+def log_menu_item_delete(sender, instance, **kwargs):
+    changelog.record([instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=Category)
+def log_category_change(sender, instance, created, **kwargs):
+    # A new category has no items yet; one with items can't be deleted.
+    if not created:
+        changelog.record_category(instance.pk)
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menu_item(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.index(instance)
+
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_menu_item(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.unindex(instance)
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, created, **kwargs):
+    backend = get_search_backend()
+    if backend is not None and not created:
+        backend.index_category(instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_user(instance.pk)
+    elif pk_set:
+        # group.user_set.add(...) / remove(...): pk_set holds the user ids.
+        for user_id in pk_set:
+            invalidate_user(user_id)
+    else:
+        invalidate_user()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def refresh_crew_loads(sender, action, **kwargs):
+    # The crew may have changed: the assignment heap is rebuilt next time.
+    if action in ("post_add", "post_remove", "post_clear"):
+        assignment.balancer.invalidate()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_user()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def evict_group(sender, **kwargs):
+    group_cache.clear()
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the cached user may keep stale.
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list("key", flat=True):
+        token_cache.delete(key)
@@ -1,3 +1,1280 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.signals import request_finished
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import (
+    assignment,
+    async_views,
+    benchmark,
+    changelog,
+    login,
+    metrics,
+    profiling,
+    seeding,
+    throttling,
+    warmup,
+)
+from .authentication import token_cache
+from .cache import LocMemMenuCache, get_menu_cache, menu_cache_key
+from .models import Category, MenuChange, MenuItem, Cart, Order
+from .pagination import MenuItemPagination, OrderPagination
+from .renderers import FastJSONRenderer, stream_json_list
+from .roles import (
+    ADMINS,
+    MANAGERS,
+    DELIVERY_CREW,
+    get_user_roles,
+    group_cache,
+    invalidate_user,
+    role_cache,
+)
+from .seeding import Seeder
+from .serializers import CartSerializer, MenuItemSerializer
+from .throttling import get_throttle_store
+from .urls import router
+from .views import LoginView
+
+
+class CartListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        category = Category.objects.create(slug="main-course", title="Main Course")
+        cls.items = [
+            MenuItem.objects.create(
+                title=f"Dish {i}",
+                price=Decimal("2.50") + i,
+                featured=False,
+                category=category,
+            )
+            for i in range(10)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def fill_cart(self, count):
+        for item in self.items[:count]:
+            Cart.objects.get_or_create(
+                user=self.user, menu_item=item, defaults={"quantity": 2}
+            )
+
+    def test_total_price(self):
+        self.fill_cart(3)
+        response = self.client.get("/api/cart/menu-items/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["Count"], "3")
+        self.assertEqual(response.data["Total_price"], Decimal("21.00"))
+        self.assertEqual(
+            [item["price"] for item in response.data["Items"]],
+            [Decimal("5.00"), Decimal("7.00"), Decimal("9.00")],
+        )
+        self.assertEqual(Cart.get_total_price(self.user), Decimal("21.00"))
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        self.fill_cart(1)
+        with self.assertNumQueries(1):
+            self.client.get("/api/cart/menu-items/")
+
+        self.fill_cart(10)
+        with self.assertNumQueries(1):
+            self.client.get("/api/cart/menu-items/")
+
+    def test_bulk_upsert(self):
+        self.fill_cart(1)
+        payload = [
+            {"menu_item": self.items[0].pk, "quantity": 5},
+            {"menu_item": self.items[1].pk, "quantity": 1},
+        ]
+        response = self.client.post(
+            "/api/cart/menu-items/bulk/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            dict(Cart.objects.values_list("menu_item", "quantity")),
+            {self.items[0].pk: 5, self.items[1].pk: 1},
+        )
+
+    def test_bulk_rejects_unknown_items(self):
+        payload = [{"menu_item": self.items[0].pk}, {"menu_item": 0}]
+        response = self.client.post(
+            "/api/cart/menu-items/bulk/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), [1])
+        self.assertFalse(Cart.objects.exists())
+
+    def test_bulk_delete(self):
+        self.fill_cart(3)
+        response = self.client.delete(
+            "/api/cart/menu-items/bulk/",
+            {"menu_items": [self.items[0].pk, self.items[1].pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Cart.objects.get().menu_item, self.items[2])
+
+    def test_checkout(self):
+        self.fill_cart(3)
+        response = self.client.post("/api/orders/")
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(order.total, Decimal("21.00"))
+        self.assertEqual(
+            list(order.items.values_list("quantity", "unit_price", "price")),
+            [
+                (2, Decimal("2.50"), Decimal("5.00")),
+                (2, Decimal("3.50"), Decimal("7.00")),
+                (2, Decimal("4.50"), Decimal("9.00")),
+            ],
+        )
+        self.assertFalse(Cart.objects.exists())
+        # A repeated checkout finds the cart empty and creates nothing.
+        self.assertEqual(self.client.post("/api/orders/").status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_checkout_of_large_cart(self):
+        Cart.objects.create(user=self.user, menu_item=self.items[9], quantity=32767)
+        response = self.client.post("/api/orders/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.get().total, Decimal("376820.50"))
+
+        Cart.objects.create(user=self.user, menu_item=self.items[0], quantity=1)
+        with mock.patch.object(Order, "MAX_TOTAL", 1):
+            response = self.client.post("/api/orders/")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Cart.objects.exists())
+
+    def test_checkout_query_count_does_not_depend_on_cart_size(self):
+        self.fill_cart(1)
+        with self.assertNumQueries(8):
+            self.client.post("/api/orders/")
+
+        self.fill_cart(10)
+        with self.assertNumQueries(8):
+            self.client.post("/api/orders/")
+
+
+class MenuCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        cls.category = Category.objects.create(slug="desserts", title="Desserts")
+        cls.item = MenuItem.objects.create(
+            title="Tiramisu",
+            price=Decimal("7.00"),
+            featured=False,
+            category=cls.category,
+        )
+
+    def setUp(self):
+        get_menu_cache().bump_version()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get("/api/menu-items/", {"ordering": "price"})
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/menu-items/", {"ordering": "price"})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_change_invalidates_cache(self):
+        self.client.get(f"/api/menu-items/{self.item.pk}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.title = "Cheesecake"
+            self.item.save()
+        response = self.client.get(f"/api/menu-items/{self.item.pk}/")
+        self.assertEqual(response.data["title"], "Cheesecake")
+
+    def test_if_none_match_returns_304_without_queries(self):
+        etag = self.client.get("/api/menu-items/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/menu-items/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_survives_a_new_version_of_same_content(self):
+        etag = self.client.get("/api/menu-items/")["ETag"]
+        get_menu_cache().bump_version()
+        response = self.client.get("/api/menu-items/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.title = "Cheesecake"
+            self.item.save()
+        response = self.client.get("/api/menu-items/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(ALLOWED_HOSTS=["*"])
+    def test_key_includes_scheme_and_host(self):
+        factory = RequestFactory()
+        keys = {
+            menu_cache_key(factory.get("/api/menu-items/", **extra), 1)
+            for extra in ({}, {"secure": True}, {"HTTP_HOST": "api.example.com"})
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_local_version_is_unique_and_renewed(self):
+        menu_cache, other = LocMemMenuCache(timeout=5), LocMemMenuCache(timeout=5)
+        self.assertNotEqual(menu_cache.get_version(), other.get_version())
+        version = menu_cache.get_version()
+        menu_cache.set("key", "data")
+        later = time.monotonic() + 6
+        with mock.patch("LittleLemonAPI.cache.time.monotonic", return_value=later):
+            self.assertNotEqual(menu_cache.get_version(), version)
+        self.assertIsNone(menu_cache.get("key"))
+
+
+class MenuChangesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        cls.category = Category.objects.create(slug="desserts", title="Desserts")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items = [
+                MenuItem.objects.create(
+                    title=title,
+                    price=Decimal("7.00"),
+                    featured=False,
+                    category=self.category,
+                )
+                for title in ("Tiramisu", "Cheesecake", "Panna Cotta")
+            ]
+        self.since = self.client.get("/api/menu-items/changes/").data["seq"]
+
+    def test_returns_upserts_and_tombstones_since_seq(self):
+        tiramisu, cheesecake, _ = self.items
+        deleted_pk = cheesecake.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            tiramisu.price = Decimal("8.00")
+            tiramisu.save()
+            tiramisu.save()
+            cheesecake.delete()
+        response = self.client.get("/api/menu-items/changes/", {"since": self.since})
+        self.assertEqual(
+            [(row["id"], row["price"]) for row in response.data["upserts"]],
+            [(tiramisu.pk, "8.00")],
+        )
+        self.assertEqual(response.data["deletes"], [deleted_pk])
+        self.assertFalse(response.data["more"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.title = "Sweets"
+            self.category.save()
+        response = self.client.get(
+            "/api/menu-items/changes/", {"since": response.data["seq"]}
+        )
+        self.assertEqual(len(response.data["upserts"]), 2)
+        self.assertEqual(response.data["upserts"][0]["category"], "Sweets")
+
+    def test_compaction_keeps_last_change_and_forces_resync(self):
+        tiramisu, cheesecake, _ = self.items
+        with self.captureOnCommitCallbacks(execute=True):
+            tiramisu.save()
+            cheesecake.delete()
+        synced = self.client.get("/api/menu-items/changes/").data["seq"]
+        MenuChange.objects.filter(deleted=True).update(
+            created=timezone.now() - timedelta(days=31)
+        )
+        self.assertEqual(
+            changelog.compact(tombstone_days=30), {"superseded": 2, "expired": 1}
+        )
+        response = self.client.get("/api/menu-items/changes/", {"since": self.since})
+        self.assertEqual(response.status_code, 410)
+        # Clients that got the tombstone need no resync.
+        response = self.client.get("/api/menu-items/changes/", {"since": synced})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/menu-items/changes/", {"since": 0})
+        self.assertEqual(len(response.data["upserts"]), 2)
+        self.assertEqual(response.data["deletes"], [])
+
+    @override_settings(MENU_CHANGES={"STREAM": False})
+    def test_stream_can_be_turned_off(self):
+        response = self.client.get(
+            "/api/menu-items/changes/stream/", HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MENU_CHANGES={"STREAM_TIMEOUT": 0, "STREAM": True})
+    def test_stream_sends_changes_as_server_sent_events(self):
+        response = self.client.get(
+            "/api/menu-items/changes/stream/",
+            HTTP_ACCEPT="text/event-stream",
+            HTTP_LAST_EVENT_ID=str(self.since - 1),
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = b"".join(response.streaming_content).decode().split("\n\n")
+        lines = events[1].splitlines()
+        self.assertEqual(lines[:2], [f"id: {self.since}", "event: changes"])
+        page = json.loads(lines[2].removeprefix("data: "))
+        self.assertEqual(page["upserts"][0]["title"], "Panna Cotta")
+
+
+class CategoryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        desserts = Category.objects.create(slug="desserts", title="Desserts")
+        Category.objects.create(slug="drinks", title="Drinks")
+        for title, price, featured in (
+            ("Tiramisu", "7.00", True),
+            ("Cheesecake", "6.50", True),
+            ("Panna Cotta", "5.00", False),
+        ):
+            MenuItem.objects.create(
+                title=title, price=Decimal(price), featured=featured, category=desserts
+            )
+
+    def setUp(self):
+        get_menu_cache().bump_version()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_categories_have_counts_and_price_range(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/categories/")
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "slug": "desserts",
+                    "title": "Desserts",
+                    "item_count": 3,
+                    "min_price": "5.00",
+                    "max_price": "7.00",
+                },
+                {
+                    "slug": "drinks",
+                    "title": "Drinks",
+                    "item_count": 0,
+                    "min_price": None,
+                    "max_price": None,
+                },
+            ],
+        )
+        response = self.client.get("/api/categories/desserts/")
+        self.assertEqual(response.data["item_count"], 3)
+
+    def test_menu_filters_by_category_slug_and_featured(self):
+        response = self.client.get(
+            "/api/menu-items/",
+            {"category": "desserts", "featured": "true", "ordering": "price"},
+        )
+        self.assertEqual(
+            [item["title"] for item in response.data["results"]],
+            ["Cheesecake", "Tiramisu"],
+        )
+        response = self.client.get("/api/menu-items/", {"category": "drinks"})
+        self.assertEqual(response.data["count"], 0)
+        response = self.client.get("/api/menu-items/", {"featured": "maybe"})
+        self.assertEqual(response.status_code, 400)
+
+
+class RoleCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", password="pass")
+        cls.admin.groups.add(Group.objects.create(name=ADMINS))
+        cls.customer = User.objects.create_user(username="customer", password="pass")
+        Group.objects.create(name=MANAGERS)
+
+    def setUp(self):
+        invalidate_user()
+        self.client = APIClient()
+
+    def test_role_checks_are_cached(self):
+        self.client.force_authenticate(self.admin)
+        self.client.get("/api/groups/manager/users/")
+        with self.assertNumQueries(1):
+            # Only the listing itself hits the database.
+            response = self.client.get("/api/groups/manager/users/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_group_change_invalidates_cache(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/groups/manager/users/").status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        self.client.post("/api/groups/manager/users/", {"username": "customer"})
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/groups/manager/users/").status_code, 200)
+
+
+class TokenCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+
+    def setUp(self):
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_lookup(self):
+        self.client.get("/api/cart/menu-items/")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/cart/menu-items/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_token_is_evicted(self):
+        self.client.get("/api/cart/menu-items/")
+        self.token.delete()
+        self.assertEqual(self.client.get("/api/cart/menu-items/").status_code, 401)
+
+    def test_deactivated_user_is_evicted(self):
+        self.client.get("/api/cart/menu-items/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/cart/menu-items/").status_code, 401)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    ]
+)
+class LoginTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        get_throttle_store().clear()
+
+    def log_in(self, password="pass"):
+        return APIClient().post(
+            "/api/token/login/", {"username": "customer", "password": password}
+        )
+
+    def test_existing_token_without_write(self):
+        with self.assertNumQueries(1):
+            response = self.log_in()
+        self.assertEqual(response.data, {"token": self.token.key})
+        response = self.log_in("wrong")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.data)
+
+    def test_rehash_with_preferred_hasher(self):
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password("pass", hasher="pbkdf2_sha1")
+        )
+        self.assertEqual(self.log_in().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("md5$"))
+        self.assertTrue(self.user.check_password("pass"))
+
+    def test_full_pool_is_busy(self):
+        pool = login.HashingPool(workers=1, max_pending=1, timeout=1)
+        self.addCleanup(pool.executor.shutdown)
+        release = threading.Event()
+        pool.submit(release.wait)
+        self.addCleanup(release.set)
+        with mock.patch.object(login, "get_hashing_pool", return_value=pool):
+            response = self.log_in()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    async def test_async_login(self):
+        view = async_views.token_login(LoginView.as_view())
+        request = RequestFactory().post(
+            "/api/token/login/",
+            {"username": "customer", "password": "pass"},
+            content_type="application/json",
+        )
+        response = await view(request)
+        self.assertEqual(json.loads(response.content), {"token": self.token.key})
+
+
+class OrderListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="manager", password="pass")
+        cls.manager.groups.add(Group.objects.create(name=MANAGERS))
+        cls.crew = User.objects.create_user(username="crew", password="pass")
+        cls.crew.groups.add(Group.objects.create(name=DELIVERY_CREW))
+        cls.customer = User.objects.create_user(username="customer", password="pass")
+        category = Category.objects.create(slug="soups", title="Soups")
+        item = MenuItem.objects.create(
+            title="Lobster Bisque",
+            price=Decimal("11.50"),
+            featured=False,
+            category=category,
+        )
+        for i in range(12):
+            order = Order.objects.create(
+                user=cls.customer,
+                delivery_crew=cls.crew if i % 2 else None,
+                total=item.price,
+                date=date(2024, 1, 1 + i // 3),
+            )
+            order.items.create(
+                menu_item=item, quantity=1, unit_price=item.price, price=item.price
+            )
+
+    def setUp(self):
+        invalidate_user()
+        self.client = APIClient()
+        patcher = mock.patch.object(OrderPagination, "page_size", 5)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch_all(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [order["id"] for order in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_pages_are_ordered_and_complete(self):
+        self.client.force_authenticate(self.manager)
+        ids = self.fetch_all("/api/orders/")
+        expected = Order.objects.order_by("-date", "-id").values_list("id", flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_scoped_by_role(self):
+        self.client.force_authenticate(self.crew)
+        self.assertEqual(len(self.fetch_all("/api/orders/")), 6)
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(len(self.fetch_all("/api/orders/?status=false")), 12)
+
+    def test_export_streams_all_orders(self):
+        self.client.force_authenticate(self.crew)
+        self.assertEqual(self.client.get("/api/orders/export/").status_code, 403)
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/api/orders/export/")
+        orders = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(orders), 12)
+        self.assertEqual(orders[0]["items"][0]["title"], "Lobster Bisque")
+
+    def test_next_page_costs_the_same(self):
+        self.client.force_authenticate(self.manager)
+        self.client.get("/api/orders/")
+        with self.assertNumQueries(2):
+            first = self.client.get("/api/orders/")
+        with self.assertNumQueries(2):
+            self.client.get(first.data["next"])
+
+    def test_tampered_cursors_are_not_found(self):
+        self.client.force_authenticate(self.manager)
+        for url, position in (
+            ("/api/orders/", ["notadate", 1]),
+            ("/api/orders/", ["2024-01-01", 10**30]),
+            ("/api/menu-items/", ["abc", 1]),
+            ("/api/menu-items/", [None, 1]),
+            ("/api/groups/delivery-crew/users/", ["x"]),
+        ):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+            with self.subTest(url=url, position=position):
+                response = self.client.get(url, {"cursor": cursor.decode()})
+                self.assertEqual(response.status_code, 404)
+
+
+class AssignmentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crew_group = Group.objects.create(name=DELIVERY_CREW)
+        cls.customer = User.objects.create_user(username="customer")
+        cls.crew = []
+        for name, open_orders in (("alice", 2), ("bob", 0), ("carol", 1)):
+            member = User.objects.create_user(username=name)
+            member.groups.add(crew_group)
+            cls.crew.append(member)
+            for _ in range(open_orders):
+                Order.objects.create(user=cls.customer, delivery_crew=member, total=1)
+        # Delivered orders don't count.
+        Order.objects.create(
+            user=cls.customer, delivery_crew=cls.crew[1], status=True, total=1
+        )
+
+    def setUp(self):
+        assignment.balancer.invalidate()
+
+    def open_orders(self):
+        return {
+            member.username: Order.objects.filter(
+                delivery_crew=member, status=False
+            ).count()
+            for member in self.crew
+        }
+
+    def test_orders_go_to_the_least_loaded_crew(self):
+        for _ in range(4):
+            Order.objects.create(user=self.customer, total=1)
+        self.assertEqual(assignment.assign_pending(batch_size=10), 4)
+        self.assertEqual(self.open_orders(), {"alice": 3, "bob": 2, "carol": 2})
+        self.assertFalse(Order.objects.filter(delivery_crew=None).exists())
+
+    def test_balancer_skips_outdated_entries(self):
+        balancer = assignment.CrewBalancer()
+        balancer.rebuild()
+        alice, bob, carol = (member.pk for member in self.crew)
+        self.assertEqual([balancer.pick() for _ in range(3)], [bob, bob, carol])
+        balancer.release(alice, 2)
+        self.assertEqual([balancer.pick() for _ in range(2)], [alice, alice])
+        self.assertEqual(balancer.loads, {alice: 2, bob: 2, carol: 2})
+
+    def test_checkout_wakes_the_worker_after_commit(self):
+        item = MenuItem.objects.create(
+            title="Soup",
+            price=Decimal("5.00"),
+            featured=False,
+            category=Category.objects.create(slug="soups", title="Soups"),
+        )
+        Cart.objects.create(user=self.customer, menu_item=item, quantity=1)
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with mock.patch.object(assignment, "notify") as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post("/api/orders/")
+        self.assertEqual(response.status_code, 201)
+        notify.assert_called_once()
+
+
+class MenuPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        category = Category.objects.create(slug="desserts", title="Desserts")
+        for i in range(12):
+            MenuItem.objects.create(
+                title=f"Cake {i}",
+                price=Decimal("4.00") + i % 4,
+                featured=False,
+                category=category,
+            )
+
+    def setUp(self):
+        get_menu_cache().bump_version()
+        invalidate_user()
+        # The throttle's role lookup is cached across requests.
+        get_user_roles(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get("/api/menu-items/", {"page_size": 10})
+        self.assertEqual(len(response.data["results"]), 10)
+        get_menu_cache().bump_version()
+        with mock.patch.object(MenuItemPagination, "max_page_size", 3):
+            response = self.client.get("/api/menu-items/", {"page_size": 10})
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_cursor_mode_follows_price_ordering(self):
+        for ordering in ("price", "-price"):
+            url = f"/api/menu-items/?pagination=cursor&ordering={ordering}"
+            prices = []
+            while url:
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                prices += [item["price"] for item in response.data["results"]]
+                url = response.data["next"]
+            self.assertEqual(len(prices), 12)
+            self.assertEqual(prices, sorted(prices, reverse=ordering == "-price"))
+
+
+class MenuSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        cls.pizza = Category.objects.create(slug="pizza", title="Pizza")
+        salads = Category.objects.create(slug="salads", title="Salads")
+        for title, category in (
+            ("Margherita", cls.pizza),
+            ("Pizza Salad", salads),
+            ("Caesar Salad", salads),
+        ):
+            MenuItem.objects.create(
+                title=title, price=Decimal("9.00"), featured=False, category=category
+            )
+
+    def setUp(self):
+        get_menu_cache().bump_version()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, term, **params):
+        response = self.client.get("/api/menu-items/", {"search": term, **params})
+        return [item["title"] for item in response.data["results"]]
+
+    def test_prefix_match_ranks_titles_first(self):
+        self.assertEqual(self.search("piz"), ["Pizza Salad", "Margherita"])
+        self.assertEqual(self.search("sal caes"), ["Caesar Salad"])
+
+    def test_index_follows_category_changes(self):
+        self.pizza.title = "Flatbread"
+        self.pizza.save()
+        self.assertEqual(self.search("flat"), ["Margherita"])
+        MenuItem.objects.get(title="Margherita").delete()
+        get_menu_cache().bump_version()
+        self.assertEqual(self.search("flat"), [])
+
+
+class AsyncReadPathTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        cls.token = Token.objects.create(user=cls.user)
+        category = Category.objects.create(slug="desserts", title="Desserts")
+        for i in range(7):
+            item = MenuItem.objects.create(
+                title=f"Cake {i}",
+                price=Decimal("4.25") + i,
+                featured=i % 2 == 0,
+                category=category,
+            )
+            if i < 3:
+                Cart.objects.create(user=cls.user, menu_item=item, quantity=i + 1)
+        cls.views = {url.name: url.callback for url in router.urls}
+
+    def setUp(self):
+        token_cache.clear()
+        get_throttle_store().clear()
+        self.factory = RequestFactory(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    async def assert_same_response(
+        self, view, sync_name, url, fallback=False, **kwargs
+    ):
+        get_menu_cache().bump_version()
+        expected = await sync_to_async(self.views[sync_name])(
+            self.factory.get(url), **kwargs
+        )
+        expected.render()
+        get_menu_cache().bump_version()
+        response = await view(self.views[sync_name])(self.factory.get(url), **kwargs)
+        # Only a fallback returns a DRF response, rendered by Django later.
+        self.assertEqual(hasattr(response, "render"), fallback)
+        if fallback:
+            response.render()
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    async def test_menu_list_matches_sync_view(self):
+        for url in (
+            "/api/menu-items/",
+            "/api/menu-items/?page=2&ordering=-price",
+            "/api/menu-items/?page_size=3&page=3",
+            "/api/menu-items/?search=cake",
+        ):
+            with self.subTest(url=url):
+                await self.assert_same_response(
+                    async_views.menu_list, "menuitem-list", url
+                )
+
+    async def test_menu_detail_and_cart_match_sync_views(self):
+        item = await MenuItem.objects.afirst()
+        await self.assert_same_response(
+            async_views.menu_detail,
+            "menuitem-detail",
+            f"/api/menu-items/{item.pk}/",
+            pk=item.pk,
+        )
+        await self.assert_same_response(
+            async_views.cart_list, "cart-list", "/api/cart/menu-items/"
+        )
+
+    async def test_invalid_requests_fall_back(self):
+        await self.assert_same_response(
+            async_views.menu_list,
+            "menuitem-list",
+            "/api/menu-items/?page=9",
+            fallback=True,
+        )
+        self.factory = RequestFactory(HTTP_AUTHORIZATION="Token invalid")
+        await self.assert_same_response(
+            async_views.cart_list,
+            "cart-list",
+            "/api/cart/menu-items/",
+            fallback=True,
+        )
+
+    async def test_throttled_requests_get_429(self):
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"user": "1/min", "anon": "1/min"},
+        }
+        view = async_views.menu_list(self.views["menuitem-list"])
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            get_throttle_store().clear()
+            statuses = []
+            for _ in range(2):
+                response = await view(self.factory.get("/api/menu-items/"))
+                statuses.append(response.status_code)
+        self.assertEqual(statuses, [200, 429])
+
+    async def test_fallbacks_are_throttled_once(self):
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"user": "2/min", "anon": "1/min"},
+        }
+        view = async_views.menu_list(self.views["menuitem-list"])
+        url = "/api/menu-items/?pagination=cursor"
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            get_throttle_store().clear()
+            statuses = []
+            for _ in range(3):
+                response = await view(self.factory.get(url))
+                statuses.append(response.status_code)
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class ValuesSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="customer", password="pass")
+        category = Category.objects.create(slug="beverages", title="Beverages")
+        for i in range(5):
+            item = MenuItem.objects.create(
+                title=f"Wine {i}",
+                price=Decimal("3.10") * (i + 1),
+                featured=i == 2,
+                category=category,
+            )
+            Cart.objects.create(user=cls.user, menu_item=item, quantity=i + 1)
+
+    def test_menu_items_match_serializer(self):
+        queryset = MenuItem.objects.order_by("id")
+        self.assertEqual(
+            MenuItemSerializer.represent(MenuItemSerializer.values(queryset)),
+            MenuItemSerializer(queryset, many=True).data,
+        )
+
+    def test_cart_matches_serializer(self):
+        queryset = Cart.objects.with_prices().order_by("id")
+        self.assertEqual(
+            CartSerializer.represent(CartSerializer.values(queryset)),
+            CartSerializer(queryset, many=True).data,
+        )
+
+
+class MenuImportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="manager", password="pass")
+        cls.manager.groups.add(Group.objects.create(name=MANAGERS))
+        category = Category.objects.create(slug="salads", title="Salads")
+        cls.item = MenuItem.objects.create(
+            title="Greek Salad",
+            price=Decimal("7.00"),
+            featured=False,
+            category=category,
+        )
+
+    def setUp(self):
+        invalidate_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def upload(self, name, content):
+        return self.client.post(
+            "/api/menu-items/import/",
+            {"file": SimpleUploadedFile(name, content.encode())},
+            format="multipart",
+        )
+
+    def test_import_upserts_and_reports_invalid_rows(self):
+        response = self.upload(
+            "menu.csv",
+            "id,title,price,featured,category\n"
+            f"{self.item.id},Greek Salad,8.25,true,Salads\n"
+            ",Bruschetta,5.00,,Starters\n"
+            ",Free Lunch,-1,,Starters\n",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+        self.assertIn("price", response.data["errors"][0]["errors"])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price, Decimal("8.25"))
+        self.assertTrue(self.item.featured)
+        bruschetta = MenuItem.objects.get(title="Bruschetta")
+        self.assertEqual(bruschetta.category.slug, "starters")
+
+    def test_export_round_trip(self):
+        response = self.client.get("/api/menu-items/export/", {"file_format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        MenuItem.objects.filter(pk=self.item.pk).update(price=Decimal("1.00"))
+        response = self.upload("menu.csv", content)
+        self.assertEqual(response.data["imported"], 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.price, Decimal("7.00"))
+        self.assertEqual(MenuItem.objects.count(), 1)
+
+    def test_new_categories_get_unique_slugs(self):
+        response = self.upload(
+            "menu.csv",
+            "id,title,price,featured,category\n"
+            ",Espresso,2.00,,Café\n"
+            ",Latte,3.00,,Cafe\n",
+        )
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(
+            set(Category.objects.values_list("slug", flat=True)),
+            {"salads", "cafe", "cafe-2"},
+        )
+
+    def test_unreadable_files_are_rejected(self):
+        header = b"id,title,price,featured,category\n"
+        for name, content in (
+            ("menu.csv", header + b",Cr\xe8me,5.00,,Desserts\n"),
+            ("menu.jsonl", b'{"title": "Cr\xe8me"}\n'),
+            ("menu.csv", header + b',"' + b"x" * 200000 + b'",5.00,,Desserts\n'),
+        ):
+            with self.subTest(name=name, size=len(content)):
+                response = self.client.post(
+                    "/api/menu-items/import/",
+                    {"file": SimpleUploadedFile(name, content)},
+                    format="multipart",
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("file", response.data)
+        response = self.upload(
+            "menu.csv", f"{header.decode()}{10**21},Soup,5.00,,Soups\n"
+        )
+        self.assertEqual(response.data["imported"], 0)
+        self.assertIn("id", response.data["errors"][0]["errors"])
+
+    def test_jsonl_import_requires_manager(self):
+        self.client.force_authenticate(User.objects.create_user(username="guest"))
+        response = self.upload("menu.jsonl", '{"title": "Soup"}\n')
+        self.assertEqual(response.status_code, 403)
+
+
+class SeederTest(TestCase):
+    def test_generates_consistent_dataset(self):
+        counts = Seeder(5, items=20, categories=2, cart_size=3, orders=2).run()
+        self.assertEqual(counts["user"], 5)
+        self.assertEqual(counts["cart"], 15)
+        self.assertEqual(counts["order"], 10)
+        user = User.objects.get(username="customer-0")
+        self.assertTrue(user.check_password(seeding.PASSWORD))
+        self.assertEqual(Token.objects.filter(user=user).count(), 1)
+        for order in Order.objects.with_items():
+            self.assertEqual(order.total, sum(item.price for item in order.items.all()))
+
+
+class BenchmarkTest(TestCase):
+    """Query and row budgets of every API route, see benchmark.py.
+
+    BENCHMARK_SCALE sets the number of generated customers and
+    BENCHMARK_LATENCY_TOLERANCE (e.g. 1.5) also enforces the p50 budgets.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.scale = dict(benchmark.load_baseline()["scale"])
+        if "BENCHMARK_SCALE" in os.environ:
+            cls.scale["scale"] = int(os.environ["BENCHMARK_SCALE"])
+        benchmark.seed(**cls.scale)
+
+    def setUp(self):
+        invalidate_user()
+        group_cache.clear()
+
+    def test_every_route_has_a_scenario(self):
+        covered = {(s.route, s.method.upper()) for s in benchmark.SCENARIOS}
+        self.assertEqual(
+            benchmark.api_routes() - covered - benchmark.SKIPPED.keys(), set()
+        )
+
+    def test_budgets(self):
+        tolerance = float(os.environ.get("BENCHMARK_LATENCY_TOLERANCE", 0))
+        results = benchmark.run(repeat=int(os.environ.get("BENCHMARK_REPEAT", 3)))
+        failures = benchmark.compare(
+            results, benchmark.load_baseline(), self.scale, tolerance or None
+        )
+        self.assertEqual(failures, [])
+
+
+class RequestProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username="staff", is_staff=True)
+        cls.customer = User.objects.create_user(username="customer")
+
+    def setUp(self):
+        profiling.profiles.clear()
+        self.client = APIClient()
+
+    def test_disabled_by_default(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/cart/menu-items/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(len(profiling.profiles), 0)
+
+    @override_settings(REQUEST_PROFILING={"SAMPLE_RATE": 1})
+    def test_sampled_request_is_recorded(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/cart/menu-items/")
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get("/api/profiles/").status_code, 200)
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get("/api/profiles/").status_code, 403)
+        profile = profiling.recent_profiles()[-1]
+        self.assertEqual(profile["path"], "/api/cart/menu-items/")
+        self.assertEqual(profile["query_count"], 1)
+
+    def test_repeated_statements_are_flagged(self):
+        request = RequestFactory().get("/")
+        profile = profiling.Profile(request, {**profiling.DEFAULTS, "SLOW_QUERIES": 2})
+        for i in range(7):
+            profile.record('SELECT * FROM "t" WHERE "id" = %s', i / 1000)
+        profile.record('SELECT * FROM "t" WHERE "id" IN (%s, %s)', 0.0005)
+        data = profile.finish(200)
+        self.assertEqual([query["ms"] for query in data["slowest"]], [6.0, 5.0])
+        self.assertEqual(
+            data["n_plus_one"],
+            [{"sql": 'SELECT * FROM "t" WHERE "id" = %s', "count": 7}],
+        )
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username="staff", is_staff=True)
+        cls.customer = User.objects.create_user(username="customer")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_route_metrics_are_exposed_to_staff(self):
+        self.client.force_authenticate(self.customer)
+        self.client.get("/api/cart/menu-items/")
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        self.assertIn(
+            'http_requests_total{method="GET",route="cart-list",status="200"}',
+            content,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="cart-list",'
+            'le="+Inf"}',
+            content,
+        )
+        self.assertIn('cache_hit_ratio{cache="token"}', content)
+
+    def test_worker_snapshots_are_added_up(self):
+        exited = {
+            "pid": 2**22 + 1,  # Above the Linux pid limit, so never alive.
+            "buckets": list(metrics.BUCKETS),
+            "counters": [["jobs_total", [["route", "x"]], 1000]],
+            "histograms": [],
+            "gauges": [["db_pool_pool_size", [["alias", "default"]], 4]],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "exited.json"), "w") as snapshot:
+                json.dump(exited, snapshot)
+            with override_settings(METRICS={"DIRECTORY": directory}):
+                content = metrics.render(metrics.collect())
+            self.assertIn(f"{os.getpid()}.json", os.listdir(directory))
+        self.assertIn('jobs_total{route="x"} 1000.0', content)
+        self.assertNotIn("db_pool_pool_size", content)
+
+
+class GroupMembershipTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin")
+        cls.admin.groups.add(Group.objects.create(name=ADMINS))
+        cls.users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+
+    def setUp(self):
+        invalidate_user()
+        group_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_unknown_users_are_rejected(self):
+        url = "/api/groups/manager/users/"
+        response = self.client.post(url, {"username": "nobody"})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            f"{url}bulk/", {"users": [self.users[0].id, "nobody"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("nobody", response.data["users"][0])
+        self.assertFalse(Group.objects.filter(user=self.users[0]).exists())
+        response = self.client.delete(f"{url}{self.users[0].id}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_assign_updates_roles(self):
+        member = APIClient()
+        member.force_authenticate(self.users[0])
+        self.assertEqual(member.get("/api/groups/manager/users/").status_code, 403)
+
+        response = self.client.post(
+            "/api/groups/manager/users/bulk/",
+            {"users": [self.users[0].id, "user1", "user0"]},
+            format="json",
+        )
+        self.assertEqual(response.data["status"], "2 user(s) assigned to Manager")
+        response = member.get("/api/groups/manager/users/", {"page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["username"], "user0")
+        self.assertEqual(
+            member.get(response.data["next"]).data["results"][0]["username"], "user1"
+        )
+
+        response = self.client.post("/api/groups/manager/users/", {"username": "user1"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete(
+            "/api/groups/manager/users/bulk/", {"users": ["user0"]}, format="json"
+        )
+        self.assertEqual(response.data["status"], "1 user(s) removed from Manager")
+        self.assertEqual(member.get("/api/groups/manager/users/").status_code, 403)
+
+
+class ThrottleTest(TestCase):
+    rates = {
+        "anon": "1/min",
+        "user": "2/min",
+        "delivery_crew": "3/min",
+        "manager": "3/min",
+        "login": "1/min",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username="customer")
+        cls.manager = User.objects.create_user(username="manager")
+        cls.manager.groups.add(Group.objects.create(name=MANAGERS))
+
+    def setUp(self):
+        invalidate_user()
+        get_throttle_store().clear()
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": self.rates,
+        }
+        patcher = override_settings(REST_FRAMEWORK=rest_framework)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def get_statuses(self, user, count):
+        client = APIClient()
+        client.force_authenticate(user)
+        return [client.get("/api/cart/menu-items/").status_code for _ in range(count)]
+
+    def test_rates_by_role(self):
+        self.assertEqual(self.get_statuses(self.customer, 3), [200, 200, 429])
+        self.assertEqual(self.get_statuses(self.manager, 4), [200, 200, 200, 429])
+        response = APIClient().post("/api/token/login/")
+        self.assertEqual(response.status_code, 400)
+        response = APIClient().post("/api/token/login/")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_forwarded_for_does_not_reset_login_rate(self):
+        statuses = [
+            APIClient()
+            .post("/api/token/login/", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}")
+            .status_code
+            for i in range(2)
+        ]
+        self.assertEqual(statuses, [400, 429])
+
+    def test_stores_refill(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stores = [
+                throttling.LocMemThrottleStore(),
+                throttling.SQLiteThrottleStore(os.path.join(directory, "t.sqlite3")),
+            ]
+            for store in stores:
+                results = [store.consume("k", 2, 0.001) for _ in range(3)]
+                allowed = [allowed for allowed, _ in results]
+                self.assertEqual(allowed, [True, True, False])
+                self.assertGreater(results[-1][1], 900)
+                # A fast refill rate fills the bucket up again.
+                self.assertTrue(store.consume("k", 2, 10**9)[0])
+
+
+class WarmupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username="manager")
+        cls.manager.groups.add(Group.objects.create(name=MANAGERS))
+        Category.objects.create(slug="soups", title="Soups")
+
+    def setUp(self):
+        invalidate_user()
+        group_cache.clear()
+        get_menu_cache().bump_version()
+
+    def test_prime_fills_caches_and_reports_steps(self):
+        warmup.prepare()
+        # The test database connection must stay open.
+        with mock.patch.object(warmup.connections, "close_all") as close_all:
+            report = warmup.prime()
+        close_all.assert_called_once()
+        self.assertLessEqual(
+            {"urls", "serializers", "database", "roles", "menu"}, report.keys()
+        )
+        self.assertEqual(role_cache.get(self.manager.pk), frozenset({MANAGERS}))
+        self.assertIsNotNone(group_cache.get(MANAGERS))
+
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        with self.assertNumQueries(0):
+            response = client.get("/api/categories/")
+        self.assertEqual(response.data[0]["slug"], "soups")
+
+    def test_first_response_is_reported_once(self):
+        warmup.report.pop("first_response_at_ms", None)
+        request_finished.connect(warmup.first_response)
+        self.addCleanup(request_finished.disconnect, warmup.first_response)
+        self.client.get("/api/")
+        first = warmup.report["first_response_at_ms"]
+        self.client.get("/api/")
+        self.assertEqual(warmup.report["first_response_at_ms"], first)
+
+
+class RendererTest(TestCase):
+    def test_same_output_as_json_renderer(self):
+        data = {
+            "price": Decimal("6.50"),
+            "date": date(2024, 1, 2),
+            "title": "Crème brûlée\u2028",
+            "items": [{"id": 1, "featured": True, "crew": None}],
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_stream_json_list(self):
+        rows = iter(range(5))
+        content = b"".join(stream_json_list(rows, lambda chunk: chunk, chunk_size=2))
+        self.assertEqual(json.loads(content), [0, 1, 2, 3, 4])
+        self.assertEqual(b"".join(stream_json_list(iter([]), list)), b"[]")
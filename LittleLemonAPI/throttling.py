@@ -0,0 +1,192 @@
+"""Token-bucket throttling over a pluggable counter store.
+
+A bucket holds up to N tokens for a rate of "N/period" and refills at
+N/period tokens a second, so clients get bursts of N and a steady N per
+period. Each request takes one token: a single store call per throttle.
+
+Stores (THROTTLE_STORE["BACKEND"]):
+- LocMemThrottleStore: per process, a dict behind a lock.
+- SQLiteThrottleStore: a SQLite file shared by the workers of one host,
+  updated with one UPSERT ... RETURNING per request.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .roles import ADMINS, DELIVERY_CREW, MANAGERS, has_role
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """"100/min" -> (capacity 100, refill rate in tokens per second)."""
+    count, period = rate.split("/")
+    return int(count), int(count) / PERIODS[period[0]]
+
+
+class LocMemThrottleStore:
+    """Buckets of this process; the least recently used are dropped first
+    (which only resets them to full)."""
+
+    def __init__(self, max_entries=100_000, **options):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        """Takes a token; returns (allowed, seconds until the next token)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteThrottleStore:
+    """Buckets in a SQLite file shared by the workers of one host.
+
+    The file only holds disposable counters, so it is written without
+    fsync. Buckets idle for an hour are deleted from time to time.
+    """
+
+    refill = "MIN(:capacity, tokens + (:now - updated) * :rate)"
+    consume_sql = f"""
+        INSERT INTO throttle_bucket (key, tokens, updated, allowed)
+        VALUES (:key, :capacity - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN {refill} >= 1 THEN {refill} - 1 ELSE {refill} END,
+            allowed = {refill} >= 1,
+            updated = :now
+        RETURNING tokens, allowed
+    """
+    cleanup_every = 1000
+
+    def __init__(self, path=None, **options):
+        self.path = str(
+            path or os.path.join(tempfile.gettempdir(), "littlelemon-throttle.sqlite3")
+        )
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle_bucket ("
+                "key TEXT PRIMARY KEY, tokens REAL, updated REAL, allowed INTEGER"
+                ") WITHOUT ROWID"
+            )
+            self._local.connection = connection
+            self._local.calls = 0
+        return connection
+
+    def consume(self, key, capacity, rate):
+        now = time.time()
+        connection = self.connection
+        tokens, allowed = connection.execute(
+            self.consume_sql,
+            {"key": key, "capacity": capacity, "rate": rate, "now": now},
+        ).fetchone()
+        self._local.calls += 1
+        if self._local.calls % self.cleanup_every == 0:
+            connection.execute(
+                "DELETE FROM throttle_bucket WHERE updated < ?", (now - 3600,)
+            )
+        return bool(allowed), 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        self.connection.execute("DELETE FROM throttle_bucket")
+
+
+@lru_cache(maxsize=None)
+def get_throttle_store():
+    config = dict(getattr(settings, "THROTTLE_STORE", {}))
+    backend = import_string(
+        config.pop("BACKEND", "LittleLemonAPI.throttling.LocMemThrottleStore")
+    )
+    return backend(**{key.lower(): value for key, value in config.items()})
+
+
+class BucketThrottle(BaseThrottle):
+    """Base class: subclasses return the scope and key of a request, or None
+    to let it through."""
+
+    def get_scope_and_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope_and_key = self.get_scope_and_key(request, view)
+        if scope_and_key is None:
+            return True
+        scope, key = scope_and_key
+        try:
+            rate = api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No throttle rate set for {scope!r} scope")
+        if rate is None:
+            return True
+        allowed, self.wait_seconds = get_throttle_store().consume(
+            f"{scope}:{key}", *parse_rate(rate)
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonThrottle(BucketThrottle):
+    """Anonymous requests, per client address."""
+
+    def get_scope_and_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return "anon", self.get_ident(request)
+
+
+class UserThrottle(BucketThrottle):
+    """Authenticated requests, per user (so per token: a user has one).
+
+    Managers and the delivery crew get their own, higher rates.
+    """
+
+    def get_scope_and_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        if has_role(request, ADMINS, MANAGERS):
+            scope = "manager"
+        elif has_role(request, DELIVERY_CREW):
+            scope = "delivery_crew"
+        else:
+            scope = "user"
+        return scope, request.user.pk
+
+
+class LoginThrottle(BucketThrottle):
+    """Token logins, per client address, whoever the user is."""
+
+    def get_scope_and_key(self, request, view):
+        return "login", self.get_ident(request)
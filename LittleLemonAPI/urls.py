@@ -1,18 +1,58 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework.authtoken.views import obtain_auth_token
 
-from .views import MenuItemViewSet, CartViewSet, ManagerUserViewSet, DeliveryCrewViewSet
+from . import async_views
+from .views import (
+    MenuItemViewSet,
+    CategoryViewSet,
+    CartViewSet,
+    ManagerUserViewSet,
+    DeliveryCrewViewSet,
+    OrderViewSet,
+    RequestProfileViewSet,
+    LoginView,
+)
 
 router = DefaultRouter()
 router.register(r"menu-items", MenuItemViewSet)
+router.register(r"categories", CategoryViewSet)
 router.register(r"cart/menu-items", CartViewSet, basename="cart")
 router.register(r"groups/manager/users", ManagerUserViewSet, basename="manager")
 router.register(
     r"groups/delivery-crew/users", DeliveryCrewViewSet, basename="delivery-crew"
 )
+router.register(r"orders", OrderViewSet, basename="orders")
+router.register(r"profiles", RequestProfileViewSet, basename="profiles")
 
 urlpatterns = [
     path("", include(router.urls)),
-    path("token/login/", obtain_auth_token),
+    # Served before djoser's token/login/, which hashes on the request thread.
+    path("token/login/", LoginView.as_view(), name="token-login"),
 ]
+
+if settings.ASYNC_READ_PATH:
+    # Served before the router; other methods fall back to the same views.
+    sync_views = {url.name: url.callback for url in router.urls}
+    urlpatterns = [
+        path(
+            "menu-items/",
+            async_views.menu_list(sync_views["menuitem-list"]),
+            name="menuitem-list",
+        ),
+        path(
+            "menu-items/<int:pk>/",
+            async_views.menu_detail(sync_views["menuitem-detail"]),
+            name="menuitem-detail",
+        ),
+        path(
+            "cart/menu-items/",
+            async_views.cart_list(sync_views["cart-list"]),
+            name="cart-list",
+        ),
+        path(
+            "token/login/",
+            async_views.token_login(LoginView.as_view()),
+            name="token-login",
+        ),
+    ] + urlpatterns
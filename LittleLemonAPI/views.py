@@ -1,101 +1,348 @@
+from django.conf import settings
 from django.contrib.auth.models import User, Group
+from django.db import IntegrityError, transaction
+from django.db.models.signals import m2m_changed
+from django.http import StreamingHttpResponse
 
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework import status
 
-from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.permissions import DjangoModelPermissions, IsAuthenticated
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated
 
+from . import assignment, changelog, login, menuio, metrics, profiling
+from .cache import get_menu_cache, menu_cache_key, menu_etag
+from .filters import MenuItemFilter
+from .models import Category, MenuItem, Cart, Order, OrderTooLarge
+from .serializers import (
+    UserSerializer,
+    LoginSerializer,
+    GroupMembersSerializer,
+    CategorySerializer,
+    MenuItemSerializer,
+    MenuChangesSerializer,
+    CartSerializer,
+    CartBulkItemSerializer,
+    CartBulkDeleteSerializer,
+    OrderSerializer,
+    OrderFilterSerializer,
+)
+from .permissions import (  # noqa: F401
+    IsAdminOrManager,
+    IsManagerOrDeliveryCrew,
+    CachedDjangoModelPermissions,
+)
+from .pagination import MenuItemPagination, OrderPagination, UserPagination
+from .renderers import (
+    EventStreamRenderer,
+    PrometheusRenderer,
+    streaming_json_response,
+)
+from .roles import ADMINS, MANAGERS, DELIVERY_CREW, get_group_id, has_role
+from .search import MenuSearchFilter
+from .throttling import LoginThrottle
 
-from .models import MenuItem, Cart
-from .serializers import UserSerializer, MenuItemSerializer, CartSerializer
-from .permissions import IsAdminOrManager, IsManagerOrDeliveryCrew  # noqa: F401
+Membership = User.groups.through
 
 
-class ManagerUserViewSet(viewsets.ViewSet):
-    permission_classes = [IsAdminOrManager]
+class GroupMembershipViewSet(viewsets.ViewSet):
+    """Lists, adds and removes the members of `group_name`, one user at a
+    time or many at once through `bulk`.
+
+    Memberships are written straight to the User.groups through table, so
+    m2m_changed is sent by hand to keep the role cache up to date.
+    """
+
+    group_name = None
+    member_label = None
+    pagination_class = UserPagination
 
     def list(self, request):
-        managers = User.objects.filter(groups__name="Managers")
-        serializer = UserSerializer(managers, many=True)
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        users = User.objects.filter(groups__name=self.group_name).only(
+            "id", "username", "email"
+        )
+        page = paginator.paginate_queryset(users, request, self)
+        return paginator.get_paginated_response(UserSerializer(page, many=True).data)
 
     def create(self, request):
         user_id = request.data.get("id")
         username = request.data.get("username")
+        lookup = {"username": username} if username else {"id": user_id}
+        try:
+            user_id = User.objects.values_list("id", flat=True).get(**lookup)
+        except (User.DoesNotExist, ValueError, TypeError):
+            raise NotFound("User not found.")
 
-        if user_id:
-            user = User.objects.get(id=user_id)
-        if username:
-            user = User.objects.get(username=username)
-
-        group, created = Group.objects.get_or_create(name="Managers")
-        if user in group.user_set.all():
+        if not self.add_members([user_id]):
             return Response(
-                {"status": "User is already a Manager."},
+                {"status": f"User is already a {self.member_label}."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        group.user_set.add(user)
         return Response(
-            {"status": "User assigned to Manager"}, status=status.HTTP_201_CREATED
+            {"status": f"User assigned to {self.member_label}"},
+            status=status.HTTP_201_CREATED,
         )
 
     def destroy(self, request, pk=None):
-        user = User.objects.get(id=pk, groups__name="Managers")
-        group = Group.objects.get(name="Managers")
-        group.user_set.remove(user)
+        if not pk.isdigit() or not self.remove_members([int(pk)]):
+            raise NotFound(f"User is not a {self.member_label}.")
         return Response(
-            {"status": "User removed from Manager"}, status=status.HTTP_200_OK
+            {"status": f"User removed from {self.member_label}"},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post", "delete"])
+    def bulk(self, request):
+        """Adds (POST) or removes (DELETE) many users at once.
+
+        {"users": [12, "alicejohnson", ...]}: ids as numbers, usernames as
+        strings. Nothing is changed if any of them does not exist.
+        """
+        serializer = GroupMembersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data["users"]
+        if request.method == "DELETE":
+            removed = self.remove_members(user_ids)
+            return Response(
+                {"status": f"{removed} user(s) removed from {self.member_label}"}
+            )
+        added = self.add_members(user_ids)
+        return Response(
+            {"status": f"{added} user(s) assigned to {self.member_label}"},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def add_members(self, user_ids):
+        """Returns the number of users that were not members yet."""
+        group_id = get_group_id(self.group_name)
+        # Indexed lookup of just these users, on the (user, group) key.
+        members = set(
+            Membership.objects.filter(
+                group_id=group_id, user_id__in=user_ids
+            ).values_list("user_id", flat=True)
+        )
+        added = [user_id for user_id in user_ids if user_id not in members]
+        # A concurrent request may add the same rows; those are skipped.
+        Membership.objects.bulk_create(
+            (Membership(group_id=group_id, user_id=user_id) for user_id in added),
+            ignore_conflicts=True,
         )
+        self.members_changed("post_add", group_id, added)
+        return len(added)
 
+    def remove_members(self, user_ids):
+        group_id = get_group_id(self.group_name)
+        removed, _ = Membership.objects.filter(
+            group_id=group_id, user_id__in=user_ids
+        ).delete()
+        self.members_changed("post_remove", group_id, user_ids)
+        return removed
+
+    def members_changed(self, action, group_id, user_ids):
+        if user_ids:
+            m2m_changed.send(
+                sender=Membership,
+                instance=Group(pk=group_id, name=self.group_name),
+                action=action,
+                reverse=True,
+                model=User,
+                pk_set=set(user_ids),
+                using=Membership.objects.db,
+            )
+
+
+class ManagerUserViewSet(GroupMembershipViewSet):
+    permission_classes = [IsAdminOrManager]
+    group_name = MANAGERS
+    member_label = "Manager"
 
-class DeliveryCrewViewSet(viewsets.ViewSet):
+
+class DeliveryCrewViewSet(GroupMembershipViewSet):
     permission_classes = [IsManagerOrDeliveryCrew]
+    group_name = DELIVERY_CREW
+    member_label = "Delivery_Crew"
 
-    def list(self, request):
-        delivery_crew = User.objects.filter(groups__name="Delivery_Crew")
-        serializer = UserSerializer(delivery_crew, many=True)
-        return Response(serializer.data)
 
-    def create(self, request):
-        user_id = request.data.get("id")
-        username = request.data.get("username")
+class CachedMenuMixin:
+    """Serves list and retrieve from the menu cache.
+
+    The key includes the catalogue version, so any change to a menu item or
+    category makes every cached response stale at once. ETags are digests
+    of the bodies, cached with them. Cached
+    responses are read from the primary: the version is bumped on commit,
+    when a replica may still serve the old rows.
+    """
 
-        if user_id:
-            user = User.objects.get(id=user_id)
-        if username:
-            user = User.objects.get(username=username)
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.using("default")
+        return queryset
 
-        group, created = Group.objects.get_or_create(name="Delivery_Crew")
-        if user in group.user_set.all():
+    def cached_response(self, handler, request, *args, **kwargs):
+        menu_cache = get_menu_cache()
+        key = menu_cache_key(request, menu_cache.get_version())
+        entry = menu_cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = (menu_etag(response.data), response.data)
+            menu_cache.set(key, entry)
+
+        etag, data = entry
+        if etag in request.headers.get("If-None-Match", ""):
             return Response(
-                {"status": "User is already a Delivery_Crew."},
-                status=status.HTTP_400_BAD_REQUEST,
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
             )
+        return Response(data, headers={"ETag": etag})
 
-        group.user_set.add(user)
-        return Response(
-            {"status": "User assigned to Delivery_Crew"}, status=status.HTTP_201_CREATED
-        )
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
 
-    def destroy(self, request, pk=None):
-        user = User.objects.get(id=pk, groups__name="Delivery_Crew")
-        group = Group.objects.get(name="Delivery_Crew")
-        group.user_set.remove(user)
-        return Response(
-            {"status": "User removed from Delivery_Crew"}, status=status.HTTP_200_OK
-        )
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
 
 
-class MenuItemViewSet(viewsets.ModelViewSet):
-    queryset = MenuItem.objects.all()
+class ValuesListMixin:
+    """List action through the serializer's .values() fast path."""
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        rows = serializer_class.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer_class.represent(page))
+        return Response(serializer_class.represent(rows))
+
+
+class MenuItemViewSet(CachedMenuMixin, ValuesListMixin, viewsets.ModelViewSet):
+    queryset = MenuItem.objects.select_related("category")
     serializer_class = MenuItemSerializer
-    filter_backends = [SearchFilter, OrderingFilter]
+    # Search runs last so it can rank results when no ?ordering= is given.
+    filter_backends = [MenuItemFilter, OrderingFilter, MenuSearchFilter]
     search_fields = ["category__title", "title"]
     ordering_fields = ["price"]
-    permission_classes = [DjangoModelPermissions]
+    ordering = ["id"]
+    pagination_class = MenuItemPagination
+    permission_classes = [CachedDjangoModelPermissions]
+
+    @action(detail=False, permission_classes=[IsAdminOrManager])
+    def export(self, request):
+        """Streams the whole (filtered) catalogue as one JSON array, or as
+        CSV/JSON Lines with ?file_format=csv|jsonl."""
+        queryset = self.filter_queryset(self.get_queryset())
+        file_format = request.query_params.get("file_format")
+        if file_format in menuio.FORMATS:
+            return StreamingHttpResponse(
+                menuio.write_rows(menuio.export_rows(queryset), file_format),
+                content_type=menuio.CONTENT_TYPES[file_format],
+                headers={
+                    "Content-Disposition": f'attachment; filename="menu.{file_format}"'
+                },
+            )
+        rows = MenuItemSerializer.values(queryset)
+        return streaming_json_response(rows, MenuItemSerializer.represent)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsAdminOrManager],
+        parser_classes=[MultiPartParser],
+    )
+    def import_menu(self, request):
+        """Imports a CSV/JSON Lines file sent as the multipart field "file"."""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        extension = upload.name.rsplit(".", 1)[-1]
+        file_format = request.query_params.get("file_format", extension)
+        if file_format not in menuio.FORMATS:
+            return Response(
+                {"file_format": [f"Expected one of {', '.join(menuio.FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            report = menuio.MenuImporter().run(menuio.read_rows(upload, file_format))
+        except menuio.InvalidFile as exc:
+            return Response({"file": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+    @action(detail=False)
+    def changes(self, request):
+        """Menu changes after ?since=<seq>, see changelog.py. 410 Gone means
+        the client must sync again from since=0."""
+        params = MenuChangesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        try:
+            page = changelog.changes_since(params.validated_data["since"])
+        except changelog.ResyncRequired:
+            return Response(
+                {"detail": "Changes were compacted, sync again from since=0."},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(page)
+
+    @action(
+        detail=False,
+        url_path="changes/stream",
+        renderer_classes=[EventStreamRenderer],
+    )
+    def changes_stream(self, request):
+        """Server-Sent Events of the changes after ?since=<seq>, or after the
+        Last-Event-ID an EventSource sends when it reconnects."""
+        if not changelog.get_config()["STREAM"]:
+            raise NotFound("The change stream is off, poll changes/ instead.")
+        params = MenuChangesSerializer(
+            data={
+                "since": request.headers.get(
+                    "Last-Event-ID", request.query_params.get("since", 0)
+                )
+            }
+        )
+        params.is_valid(raise_exception=True)
+        since = params.validated_data["since"]
+        stream = (
+            changelog.aevent_stream(since)
+            if settings.ASYNC_READ_PATH
+            else changelog.event_stream(since)
+        )
+        return StreamingHttpResponse(
+            stream,
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Rows about to be changed are read from the primary, not a replica.
+        if self.request.method not in SAFE_METHODS:
+            queryset = queryset.using("default")
+        return queryset
+
+
+class CategoryViewSet(CachedMenuMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
+    """Categories with their item count and price range, by slug.
+
+    The aggregates come from one grouped query, cached with the menu until
+    an item or category changes.
+    """
+
+    queryset = Category.objects.with_stats().order_by("title")
+    serializer_class = CategorySerializer
+    lookup_field = "slug"
+    # A menu has few categories: they are sent in one response.
+    pagination_class = None
+    permission_classes = [CachedDjangoModelPermissions]
 
 
 class CartViewSet(viewsets.ViewSet):
@@ -103,14 +350,14 @@ class CartViewSet(viewsets.ViewSet):
 
     def list(self, request):
         """Возвращает текущие товары в корзине для пользователя."""
-        cart_items = Cart.objects.filter(user=request.user)
-        serializer = CartSerializer(cart_items, many=True)
-        total_price = Cart.get_total_price(request.user)
+        cart_items = CartSerializer.represent(
+            CartSerializer.values(Cart.objects.filter(user=request.user).with_prices())
+        )
         return Response(
             {
                 "Count": f"{len(cart_items)}",
-                "Total_price": total_price,
-                "Items": serializer.data,
+                "Total_price": sum(item["price"] for item in cart_items),
+                "Items": cart_items,
             }
         )
 
@@ -133,3 +380,139 @@ class CartViewSet(viewsets.ViewSet):
             {"Success!": "Your cart has been successfully emptied."},
             status=status.HTTP_204_NO_CONTENT,
         )
+
+    @action(detail=False, methods=["post", "delete"])
+    def bulk(self, request):
+        """Adds or updates (POST) and removes (DELETE) many cart items at once.
+
+        POST: [{"menu_item": 1, "quantity": 2}, ...]
+        DELETE: {"menu_items": [1, 2, ...]}
+        """
+        if request.method == "DELETE":
+            serializer = CartBulkDeleteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            deleted, _ = Cart.objects.filter(
+                user=request.user,
+                menu_item_id__in=serializer.validated_data["menu_items"],
+            ).delete()
+            return Response({"Success!": f"{deleted} item(s) removed from your cart."})
+
+        serializer = CartBulkItemSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        carts = serializer.save(user=request.user)
+        return Response(
+            {"Success!": f"{len(carts)} item(s) have been saved to your cart."},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class OrderViewSet(viewsets.GenericViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+
+    def get_queryset(self):
+        """Managers see all orders, delivery crew their assignments,
+        customers their own orders."""
+        filters = OrderFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        filters = filters.validated_data
+
+        queryset = Order.objects.with_items()
+        if has_role(self.request, ADMINS, MANAGERS):
+            if "delivery_crew" in filters:
+                queryset = queryset.filter(delivery_crew=filters["delivery_crew"])
+        elif has_role(self.request, DELIVERY_CREW):
+            queryset = queryset.filter(delivery_crew=self.request.user)
+        else:
+            queryset = queryset.filter(user=self.request.user)
+
+        for field in ("status", "date"):
+            if field in filters:
+                queryset = queryset.filter(**{field: filters[field]})
+        return queryset
+
+    def list(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAdminOrManager])
+    def export(self, request):
+        """Streams all matching orders as one JSON array, newest first."""
+        return streaming_json_response(
+            self.get_queryset().order_by("-date", "-id"),
+            lambda orders: OrderSerializer(orders, many=True).data,
+            chunk_size=500,
+        )
+
+    def create(self, request):
+        """Оформляет заказ из корзины текущего пользователя."""
+        try:
+            order = Order.create_from_cart(request.user)
+        except IntegrityError:
+            return Response(
+                {"status": "Your cart has already been checked out."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except OrderTooLarge:
+            return Response(
+                {"status": "The order total is too large."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if order is None:
+            return Response(
+                {"status": "Your cart is empty."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        # The delivery crew is assigned in the background, see assignment.py.
+        transaction.on_commit(assignment.notify)
+        order = Order.objects.with_items().get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class RequestProfileViewSet(viewsets.ViewSet):
+    """Recent request profiles, newest first. Empty unless profiling is on."""
+
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        return Response(profiling.recent_profiles())
+
+
+class LoginView(APIView):
+    """Token login, see login.py: {"username", "password"} -> {"token"}."""
+
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = [LoginThrottle]
+
+    def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            key = login.login(**serializer.validated_data)
+        except login.InvalidCredentials:
+            return Response(
+                {"non_field_errors": [login.INVALID_CREDENTIALS]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except login.Busy:
+            return Response(
+                {"detail": login.BUSY},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+        return Response({"token": key})
+
+
+class MetricsView(APIView):
+    """Request, cache and database pool metrics for Prometheus."""
+
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(
+            metrics.render(metrics.collect()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,164 @@
+"""Worker warm-up, so the first requests after a deploy are not the slow ones.
+
+prepare() runs from AppConfig.ready() and builds what needs no database:
+the URL resolver (router and djoser routes) and the serializer fields.
+prime() runs once the WSGI/ASGI application exists: it opens the database
+connection and fills the group, role, permission and menu caches. It then
+closes the connections again, so a gunicorn master that preloads the app
+(see gunicorn.conf.py) forks without sharing them; post_fork reconnects.
+
+Each step is timed and logged as one JSON line, as is the first response
+of the process. `manage.py bootreport` adds the import time per module.
+"""
+
+import json
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.signals import request_finished
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import get_resolver, reverse
+
+from .roles import (
+    ADMINS,
+    DELIVERY_CREW,
+    MANAGERS,
+    get_user_permissions,
+    group_cache,
+    role_cache,
+)
+from .serializers import (
+    CartSerializer,
+    CategorySerializer,
+    MenuItemSerializer,
+    OrderSerializer,
+)
+from .views import CategoryViewSet, MenuItemViewSet
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    # Staff users whose roles and permissions are cached up front.
+    "MAX_USERS": 200,
+    # Public URL of the API, e.g. "https://api.example.com". Menu pages
+    # hold absolute links, so they are only cached with it.
+    "BASE_URL": None,
+}
+
+booted = time.perf_counter()
+report = {}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "WARMUP", {})}
+
+
+def timed(step):
+    """Times a step. A failed step is logged: it must not stop the boot."""
+
+    def run():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", step.__name__)
+            return
+        report[step.__name__] = round((time.perf_counter() - start) * 1000, 2)
+
+    return run
+
+
+@timed
+def urls():
+    resolver = get_resolver()
+    reverse("menuitem-list")  # Builds the reverse lookups of every route.
+    for path in ("/api/menu-items/", "/api/cart/menu-items/", "/api/users/me/"):
+        resolver.resolve(path)
+
+
+@timed
+def serializers():
+    for serializer_class in (MenuItemSerializer, CartSerializer, CategorySerializer):
+        serializer_class.represent([])
+    OrderSerializer().fields
+
+
+@timed
+def database():
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+@timed
+def roles():
+    memberships = User.groups.through.objects.values_list("user_id", "group__name")
+    staff = list(
+        User.objects.filter(groups__name__in=(ADMINS, MANAGERS, DELIVERY_CREW))
+        .distinct()
+        .order_by("pk")[: get_config()["MAX_USERS"]]
+    )
+    groups = {}
+    for user_id, name in memberships.filter(user__in=[user.pk for user in staff]):
+        groups.setdefault(user_id, set()).add(name)
+    for user in staff:
+        role_cache.set(user.pk, frozenset(groups.get(user.pk, ())))
+        get_user_permissions(user)
+    for pk, name in Group.objects.values_list("pk", "name"):
+        group_cache.set(name, pk)
+
+
+@timed
+def menu():
+    """Caches the category list and the first menu page, as an anonymous
+    request to BASE_URL would."""
+    routes = [(CategoryViewSet, "category-list")]
+    base_url = get_config()["BASE_URL"]
+    if base_url:
+        routes.append((MenuItemViewSet, "menuitem-list"))
+    url = urlsplit(base_url or "")
+    factory = RequestFactory(headers={"host": url.netloc} if url.netloc else None)
+    for viewset, route in routes:
+        view = viewset.as_view(
+            {"get": "list"},
+            authentication_classes=[],
+            permission_classes=[],
+            throttle_classes=[],
+        )
+        view(factory.get(reverse(route), secure=url.scheme == "https"))
+
+
+def prepare():
+    """Warm-up steps that need no database, safe during AppConfig.ready()."""
+    urls()
+    serializers()
+
+
+def prime():
+    """Warm-up steps that query the database; logs the whole report."""
+    database()
+    roles()
+    menu()
+    # Nothing opened here may be shared with forked workers.
+    connections.close_all()
+    report["boot_ms"] = round((time.perf_counter() - booted) * 1000, 2)
+    logger.info(json.dumps({"warmup": report}))
+    return report
+
+
+def connect():
+    """Opens this worker's connections, e.g. from gunicorn's post_fork."""
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def first_response(sender, **kwargs):
+    request_finished.disconnect(first_response)
+    # Since boot, i.e. since the app was loaded.
+    at_ms = round((time.perf_counter() - booted) * 1000, 2)
+    report["first_response_at_ms"] = at_ms
+    logger.info(json.dumps({"first_response_at_ms": at_ms}))
@@ -0,0 +1,31 @@
+"""gunicorn settings, read from the working directory:
+
+    gunicorn LittleLemon.wsgi
+
+The master imports and warms the app up once (LittleLemonAPI/warmup.py),
+then forks it into the workers, which only open their own connections.
+
+Sync workers serve one request at a time, so a login blocks its worker
+for the whole password check: the hashing pool of LittleLemonAPI/login.py
+then only caps the hashing threads. For logins at shift change run ASGI
+workers, whose logins wait on the pool without holding a thread:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn LittleLemon.asgi
+
+or at least threaded workers (GUNICORN_WORKER_CLASS=gthread, GUNICORN_THREADS),
+so a worker keeps serving other requests while a login hashes.
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    from LittleLemonAPI import warmup
+
+    warmup.connect()